@@ -0,0 +1,187 @@
+import os
+import struct
+import subprocess
+
+# Uploads larger than AUDIO_MAX_BYTES or longer than AUDIO_MAX_SECONDS are rejected
+AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", str(25 * 1024 * 1024)))
+AUDIO_MAX_SECONDS = float(os.getenv("AUDIO_MAX_SECONDS", "300"))
+AUDIO_DECODE_TIMEOUT = float(os.getenv("AUDIO_DECODE_TIMEOUT", "60"))
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+
+# Every recognizer backend takes 16 kHz mono 16-bit little-endian PCM
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
+
+# ffmpeg demuxer for each sniffed container
+FFMPEG_FORMATS = {
+    "wav": "wav",
+    "webm": "matroska",
+    "mkv": "matroska",
+    "ogg": "ogg",
+    "mp3": "mp3",
+    "aac": "aac",
+    "flac": "flac",
+    "mp4": "mov",
+    "m4a": "mov",
+}
+
+class AudioRejected(ValueError):
+    """The upload exceeds the size or duration caps."""
+
+def sniff_format(data):
+    """Container of an audio upload from its magic bytes, or None if unrecognized."""
+    head = bytes(data[:64])
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        # EBML header; MediaRecorder in Chrome and Firefox writes DocType "webm"
+        return "webm" if b"webm" in head else "mkv"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    if head[:3] == b"ID3":
+        return "mp3"
+    if len(head) >= 2 and head[0] == 0xFF:
+        # MPEG frame sync: layer III is MP3, layer "0" is ADTS AAC
+        if head[1] & 0xE6 == 0xE2:
+            return "mp3"
+        if head[1] & 0xF6 == 0xF0:
+            return "aac"
+    return None
+
+def parse_wav(data):
+    """(format_tag, channels, sample_rate, bits, data_offset, data_size) from a RIFF/WAVE header, or None."""
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id = bytes(data[offset:offset + 4])
+        size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"fmt " and size >= 16:
+            tag, channels, rate, _, _, bits = struct.unpack_from("<HHIIHH", data, body)
+            fmt = (tag, channels, rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            # Streamed recorders leave the size at 0 or 0xFFFFFFFF
+            if size == 0 or size > len(data) - body:
+                size = len(data) - body
+            return fmt + (body, size)
+        offset = body + size + (size & 1)
+    return None
+
+def check_size(size):
+    if size > AUDIO_MAX_BYTES:
+        raise AudioRejected(f"Audio is larger than {AUDIO_MAX_BYTES // (1024 * 1024)} MB")
+
+def check_duration(seconds):
+    if seconds > AUDIO_MAX_SECONDS:
+        raise AudioRejected(f"Audio is longer than {AUDIO_MAX_SECONDS:g} seconds")
+
+def ffmpeg_decode(audio_data, input_format=None):
+    """
+    Decode through a single ffmpeg process, piping the upload in and raw
+    16 kHz mono PCM out (no temp files, no intermediate WAV). Decoding stops
+    just past AUDIO_MAX_SECONDS, so overlong audio costs no more than the cap.
+    Returns None if ffmpeg cannot decode the data.
+    """
+    command = [FFMPEG_BINARY, "-nostdin", "-hide_banner", "-loglevel", "error"]
+    if input_format:
+        command += ["-f", input_format]
+    command += [
+        "-i", "pipe:0", "-t", f"{AUDIO_MAX_SECONDS + 1:g}", "-vn",
+        "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1",
+    ]
+    try:
+        result = subprocess.run(command, input=audio_data, capture_output=True, timeout=AUDIO_DECODE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise AudioRejected(f"Audio could not be decoded within {AUDIO_DECODE_TIMEOUT:g} seconds")
+    if result.returncode != 0:
+        error = result.stderr.decode("utf-8", errors="replace").strip()
+        print(f"ffmpeg could not decode {input_format or 'audio'}: {error[-500:]}")
+        return None
+    check_duration(len(result.stdout) / (SAMPLE_RATE * SAMPLE_WIDTH))
+    return result.stdout
+
+def decode_audio(audio_data, audio_format=None):
+    """
+    Decode an audio upload to 16 kHz mono 16-bit PCM.
+
+    The container is sniffed from the magic bytes; audio_format (usually the
+    file extension) is only a hint for data that cannot be sniffed. WAV
+    uploads already in the target format are returned as a zero-copy view of
+    the upload. Everything else is decoded once by ffmpeg.
+
+    Returns a bytes-like PCM buffer, or None if the data is not decodable
+    audio. Raises AudioRejected when the size or duration cap is exceeded.
+    """
+    check_size(len(audio_data))
+    container = sniff_format(audio_data) or (audio_format or "").lower()
+    if container == "wav":
+        wav = parse_wav(audio_data)
+        if wav is not None:
+            tag, channels, rate, bits, offset, size = wav
+            if rate and channels and bits >= 8:
+                check_duration(size / (rate * channels * (bits // 8)))
+            # 1 is integer PCM, 0xFFFE is WAVE_FORMAT_EXTENSIBLE (PCM in practice)
+            if tag in (1, 0xFFFE) and channels == 1 and rate == SAMPLE_RATE and bits == 16:
+                return memoryview(audio_data)[offset:offset + size - size % SAMPLE_WIDTH]
+    return ffmpeg_decode(audio_data, FFMPEG_FORMATS.get(container))
+
+def benchmark(paths, repeat=3):
+    """
+    Per-request CPU seconds (including ffmpeg child processes) and peak
+    Python memory of the old pydub path (decode by extension, convert,
+    export WAV, re-read it with sr.AudioFile) versus decode_audio.
+    """
+    import io
+    import tracemalloc
+    import speech_recognition as sr
+    from pydub import AudioSegment
+
+    def pydub_decode(data):
+        audio = AudioSegment.from_file(io.BytesIO(data), format=sniff_format(data))
+        audio = audio.set_frame_rate(SAMPLE_RATE).set_channels(1)
+        wav_io = io.BytesIO()
+        audio.export(wav_io, format="wav")
+        wav_io.seek(0)
+        with sr.AudioFile(wav_io) as source:
+            return sr.Recognizer().record(source).frame_data
+
+    def cpu_seconds():
+        times = os.times()
+        return times.user + times.system + times.children_user + times.children_system
+
+    uploads = []
+    for path in paths:
+        with open(path, "rb") as f:
+            uploads.append(f.read())
+    results = {}
+    for label, decode in (("pydub", pydub_decode), ("direct", decode_audio)):
+        cpu = 0.0
+        peak = 0
+        for _ in range(repeat):
+            for data in uploads:
+                tracemalloc.start()
+                start = cpu_seconds()
+                decode(data)
+                cpu += cpu_seconds() - start
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+        results[label] = {"cpuSeconds": round(cpu / (repeat * len(uploads)), 4), "peakMemoryMB": round(peak / 2 ** 20, 2)}
+    results["saved"] = {
+        "cpuSeconds": round(results["pydub"]["cpuSeconds"] - results["direct"]["cpuSeconds"], 4),
+        "peakMemoryMB": round(results["pydub"]["peakMemoryMB"] - results["direct"]["peakMemoryMB"], 2),
+    }
+    return results
+
+if __name__ == "__main__":
+    # python audio.py recording1.webm recording2.webm ...  (the old path needs pydub installed)
+    import sys
+    import json
+    if len(sys.argv) < 2:
+        sys.exit("usage: python audio.py <audio files>")
+    print(json.dumps(benchmark(sys.argv[1:]), indent=2))
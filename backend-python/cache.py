@@ -0,0 +1,127 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", "256"))
+RESUME_CACHE_DIR = os.getenv("RESUME_CACHE_DIR")
+RESUME_CACHE_DISK_SIZE = int(os.getenv("RESUME_CACHE_DISK_SIZE", "5000"))
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+class ResumeCache:
+    """
+    Content-addressed cache for extracted resume text and embeddings.
+
+    Entries are dicts with "text", "pages", "embedding" and the scoring
+    windows ("chunkSections", "chunkEmbeddings"), held in an in-memory LRU.
+    When cache_dir is set, entries are also written to disk (text as JSON,
+    embeddings as .npy) so they survive restarts.
+    """
+
+    def __init__(self, max_entries=RESUME_CACHE_SIZE, cache_dir=RESUME_CACHE_DIR, max_disk_entries=RESUME_CACHE_DISK_SIZE):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._load_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._put_memory(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._put_memory(key, entry)
+        self._save_to_disk(key, entry)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "diskEnabled": bool(self.cache_dir),
+            }
+
+    def _put_memory(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".json", base + ".npy", base + ".chunks.npy"
+
+    def _load_from_disk(self, key):
+        if not self.cache_dir:
+            return None
+        json_path, npy_path, chunks_path = self._paths(key)
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            entry["embedding"] = np.load(npy_path) if os.path.exists(npy_path) else None
+            entry["chunkEmbeddings"] = np.load(chunks_path) if os.path.exists(chunks_path) else None
+            # Touch the file so disk eviction stays least-recently-used
+            os.utime(json_path)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _save_to_disk(self, key, entry):
+        if not self.cache_dir:
+            return
+        json_path, npy_path, chunks_path = self._paths(key)
+        try:
+            if entry.get("embedding") is not None:
+                np.save(npy_path, np.asarray(entry["embedding"], dtype=np.float32))
+            if entry.get("chunkEmbeddings") is not None:
+                np.save(chunks_path, np.asarray(entry["chunkEmbeddings"], dtype=np.float32))
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump({k: v for k, v in entry.items() if k not in ("embedding", "chunkEmbeddings")}, f)
+            self._evict_disk()
+        except OSError as e:
+            print(f"Error writing resume cache entry: {str(e)}")
+
+    def _evict_disk(self):
+        json_files = [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir) if name.endswith(".json")]
+        if len(json_files) <= self.max_disk_entries:
+            return
+        json_files.sort(key=os.path.getmtime)
+        for json_path in json_files[:len(json_files) - self.max_disk_entries]:
+            base = json_path[:-len(".json")]
+            for path in (json_path, base + ".npy", base + ".chunks.npy"):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            with self._lock:
+                self.evictions += 1
+
+resume_cache = ResumeCache()
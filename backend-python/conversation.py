@@ -0,0 +1,144 @@
+import os
+import json
+import asyncio
+import hashlib
+from llm import groq_chat, estimate_tokens, LLMError
+from llm_cache import llm_cache, MemoryBackend
+from scheduler import run_in_stage, StageOverloaded
+
+# Most recent Q&A turns sent verbatim; older turns are folded into a running summary
+HISTORY_KEEP_TURNS = max(1, int(os.getenv("HISTORY_KEEP_TURNS", "2")))
+# Upper bound on the estimated prompt tokens of each next-question call
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "2500"))
+# How long a history summary stays reusable after it was written
+SUMMARY_TTL = float(os.getenv("SUMMARY_TTL", "7200"))
+SUMMARY_MAX_TOKENS = 200
+SUMMARY_CACHE_SIZE = 1024
+
+# Summaries share the LLM response cache backend, so with LLM_CACHE_BACKEND=sqlite
+# every worker on the host reuses them; with the cache off they stay in this worker
+_summaries = llm_cache.backend or MemoryBackend(SUMMARY_CACHE_SIZE)
+_inflight = {}
+# Strong references to background prefetches; the event loop only keeps weak ones
+_background = set()
+
+def prefix_keys(turns):
+    """
+    Cache key of every prefix of turns, chained so each key costs one hash.
+    Only the question and answer count: evaluations or scores the client
+    attaches to a turn later don't change its summary.
+    """
+    keys = []
+    key = ""
+    for turn in turns:
+        content = json.dumps([key, turn.get("question"), turn.get("answer")])
+        key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        keys.append(key)
+    return keys
+
+def find_summary(keys):
+    """(number of turns, summary) of the longest prefix with a stored summary, or (0, "")."""
+    for length in range(len(keys), 0, -1):
+        summary = _summaries.get(f"summary:{keys[length - 1]}")
+        if summary is not None:
+            return length, summary
+    return 0, ""
+
+async def run_summary_io(fn, *args):
+    if getattr(_summaries, "blocking", False):
+        return await run_in_stage("io", fn, *args)
+    return fn(*args)
+
+def fallback_fold(summary, turns):
+    """Extractive fold used when the LLM is unavailable: keep each question and the start of its answer."""
+    pieces = [f"Q: {str(turn.get('question', ''))[:150]} A: {str(turn.get('answer', ''))[:200]}" for turn in turns]
+    return " ".join([summary] + pieces).strip()
+
+async def fold_turns(summary, turns):
+    transcript = "\n".join(f"Question: {turn.get('question')}\nAnswer: {turn.get('answer')}" for turn in turns)
+    prompt = (
+        "Update the running summary of a job interview with the next questions and answers. "
+        "Keep the topics already covered, the key facts the candidate stated and how well they answered. "
+        "Use at most 5 sentences of plain text.\n"
+        f"Current summary: {summary or 'None yet.'}\n"
+        f"{transcript}\n"
+        "Updated summary:"
+    )
+    text = await groq_chat(prompt, system_prompt="You summarize interview transcripts concisely.", max_tokens=SUMMARY_MAX_TOKENS, temperature=0.2)
+    return text.strip()
+
+async def summarize_prefix(turns):
+    """
+    Running summary of turns. The longest prefix with a stored summary is
+    extended with all remaining turns in a single fold call, so a warm
+    history costs at most one call per interview turn and a cold one (a
+    restarted or different worker) still costs one. Concurrent requests for
+    the same prefix share a single in-flight fold.
+    """
+    if not turns:
+        return ""
+    keys = prefix_keys(turns)
+    key = keys[-1]
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fold_prefix(turns, keys))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+async def _fold_prefix(turns, keys):
+    length, previous = await run_summary_io(find_summary, keys)
+    if length == len(turns):
+        return previous
+    try:
+        summary = await fold_turns(previous, turns[length:])
+    except LLMError as e:
+        print(f"Error summarizing interview history, using extractive fold: {str(e)}")
+        return fallback_fold(previous, turns[length:])
+    try:
+        await run_summary_io(_summaries.put, f"summary:{keys[-1]}", summary, SUMMARY_TTL)
+    except StageOverloaded:
+        pass
+    return summary
+
+async def compact_history(chat_history):
+    """Split the history into (summary of older turns, last HISTORY_KEEP_TURNS turns verbatim)."""
+    older = chat_history[:-HISTORY_KEEP_TURNS]
+    recent = chat_history[-HISTORY_KEEP_TURNS:]
+    return await summarize_prefix(older), recent
+
+def prefetch_summary(chat_history):
+    """
+    Fold the turn that will leave the verbatim window on the next request in
+    the background, so the next call finds its summary already cached.
+    """
+    upcoming = chat_history[:len(chat_history) + 1 - HISTORY_KEEP_TURNS]
+    if upcoming:
+        task = asyncio.ensure_future(summarize_prefix(upcoming))
+        _background.add(task)
+        task.add_done_callback(prefetch_done)
+
+def prefetch_done(task):
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error prefetching interview summary: {task.exception()!r}")
+
+def fit_prompt(build, resume_text, summary, recent, budget=PROMPT_TOKEN_BUDGET):
+    """
+    Build the prompt, shrinking its parts until the estimated token count fits
+    the budget: long recent answers first, then the summary, then the resume.
+    """
+    prompt = build(resume_text, summary, recent)
+    for answer_chars, summary_chars, resume_chars in ((600, None, None), (300, 800, None), (200, 400, 3000), (150, 300, 1500)):
+        if estimate_tokens(prompt) <= budget:
+            break
+        recent = [
+            dict(qa, answer=qa["answer"][:answer_chars]) if isinstance(qa.get("answer"), str) else qa
+            for qa in recent
+        ]
+        if summary_chars is not None:
+            summary = summary[:summary_chars]
+        if resume_chars is not None:
+            resume_text = resume_text[:resume_chars]
+        prompt = build(resume_text, summary, recent)
+    return prompt
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: fall back to in-process locking only
+    fcntl = None
+
+EMBEDDING_INDEX_DIR = os.getenv("EMBEDDING_INDEX_DIR", "embedding_index")
+EMBEDDING_INDEX_DTYPE = os.getenv("EMBEDDING_INDEX_DTYPE", "float32")
+
+class EmbeddingIndex:
+    """
+    On-disk index of resume embeddings.
+
+    Vectors are L2-normalised and appended to a contiguous row-major matrix
+    file (vectors.bin) that is memory-mapped for search, so every worker
+    shares the same page cache instead of loading its own copy. Each row's
+    per-window embeddings (what the section scorer re-ranks with) are
+    appended the same way to chunks.bin. Row ids, metadata, window ranges
+    and tombstones live in an append-only JSON-lines sidecar (rows.jsonl).
+    compact() rewrites all three files without tombstoned rows.
+    """
+
+    def __init__(self, index_dir=EMBEDDING_INDEX_DIR, dim=384, dtype=EMBEDDING_INDEX_DTYPE):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.vectors_path = os.path.join(index_dir, "vectors.bin")
+        self.rows_path = os.path.join(index_dir, "rows.jsonl")
+        self.chunks_path = os.path.join(index_dir, "chunks.bin")
+        self.lock_path = os.path.join(index_dir, "index.lock")
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._ids = []
+        self._metadata = []
+        self._chunks = []
+        self._chunk_end = 0
+        self._chunk_matrix = None
+        self._deleted = set()
+        self._rows_offset = 0
+        self._rows_inode = None
+        self._live = None
+        os.makedirs(index_dir, exist_ok=True)
+        for path in (self.vectors_path, self.rows_path, self.chunks_path):
+            if not os.path.exists(path):
+                open(path, "ab").close()
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync(self):
+        """
+        _refresh() under a shared file lock, for readers: compact() replaces
+        the files one by one while holding the exclusive lock, so a reader
+        never pairs the new vectors with the old rows. Call with self._lock held.
+        """
+        if fcntl is None:
+            self._refresh()
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            try:
+                self._refresh()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _row_bytes(self):
+        return self.dim * self.dtype.itemsize
+
+    def _refresh(self):
+        """Pick up rows appended by this or any other process since the last call."""
+        inode = os.stat(self.rows_path).st_ino
+        if inode != self._rows_inode:
+            # Another process compacted the index: replay the new files from scratch
+            self._reset()
+            self._rows_inode = inode
+        with open(self.rows_path, "r", encoding="utf-8") as f:
+            f.seek(self._rows_offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partially written line, read it next time
+                self._rows_offset += len(line.encode("utf-8"))
+                record = json.loads(line)
+                self._live = None
+                if "deleted" in record:
+                    self._deleted.add(record["deleted"])
+                else:
+                    self._ids.append(record["id"])
+                    self._metadata.append(record.get("metadata") or {})
+                    self._deleted.discard(record["id"])
+                    chunks = record.get("chunks")
+                    self._chunks.append((chunks[0], chunks[1], record.get("sections") or []) if chunks else None)
+                    if chunks:
+                        self._chunk_end = max(self._chunk_end, chunks[0] + chunks[1])
+        rows = min(len(self._ids), os.path.getsize(self.vectors_path) // self._row_bytes())
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim)) if rows else None
+        chunk_rows = min(self._chunk_end, os.path.getsize(self.chunks_path) // self._row_bytes())
+        if self._chunk_matrix is None or self._chunk_matrix.shape[0] != chunk_rows:
+            self._chunk_matrix = np.memmap(self.chunks_path, dtype=self.dtype, mode="r", shape=(chunk_rows, self.dim)) if chunk_rows else None
+
+    def _repair_tail(self):
+        """
+        Drop what a crashed writer left behind: vectors or windows without
+        their sidecar row, or a partially written row. Ids are matched to vectors by
+        position, so an orphan would shift every later row. Must be called
+        with the file lock held, right after _refresh().
+        """
+        if os.path.getsize(self.rows_path) > self._rows_offset:
+            with open(self.rows_path, "r+b") as f:
+                f.truncate(self._rows_offset)
+        for path, rows in ((self.vectors_path, len(self._ids)), (self.chunks_path, self._chunk_end)):
+            if os.path.getsize(path) > rows * self._row_bytes():
+                with open(path, "r+b") as f:
+                    f.truncate(rows * self._row_bytes())
+
+    def _reset(self):
+        self._matrix = None
+        self._ids = []
+        self._metadata = []
+        self._chunks = []
+        self._chunk_end = 0
+        self._chunk_matrix = None
+        self._deleted = set()
+        self._rows_offset = 0
+        self._live = None
+
+    def _live_rows(self):
+        """Map id -> latest row number, skipping tombstoned ids."""
+        if self._live is None:
+            latest = {}
+            for row, resume_id in enumerate(self._ids):
+                latest[resume_id] = row
+            self._live = {resume_id: row for resume_id, row in latest.items() if resume_id not in self._deleted}
+        return self._live
+
+    def __contains__(self, resume_id):
+        with self._lock:
+            self._sync()
+            return resume_id in self._live_rows()
+
+    def get_chunks(self, resume_id):
+        """(sections, window embeddings) stored with resume_id, or None if it has none."""
+        with self._lock:
+            self._sync()
+            row = self._live_rows().get(resume_id)
+            chunks = self._chunks[row] if row is not None else None
+            if chunks is None or self._chunk_matrix is None or chunks[0] + chunks[1] > self._chunk_matrix.shape[0]:
+                return None
+            start, count, sections = chunks
+            return sections, np.asarray(self._chunk_matrix[start:start + count], dtype=np.float32)
+
+    def add(self, resume_id, embedding, metadata=None, chunk_sections=None, chunk_embeddings=None):
+        """
+        Append (or replace) the embedding stored under resume_id, plus the
+        section names and normalized embeddings of its windows if given.
+        """
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Expected embedding of size {self.dim}, got {vector.shape[0]}")
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+        record = {"id": resume_id, "metadata": dict(metadata or {}, addedAt=time.time())}
+        with self._file_lock():
+            self._refresh()
+            self._repair_tail()
+            # Vectors first, then the sidecar row: readers only trust rows present in all files
+            with open(self.vectors_path, "ab") as f:
+                f.write(vector.astype(self.dtype).tobytes())
+            if chunk_sections:
+                windows = np.asarray(chunk_embeddings, dtype=np.float32).reshape(len(chunk_sections), self.dim)
+                with open(self.chunks_path, "ab") as f:
+                    f.write(windows.astype(self.dtype).tobytes())
+                record["chunks"] = [self._chunk_end, len(chunk_sections)]
+                record["sections"] = list(chunk_sections)
+            with open(self.rows_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def delete(self, resume_id):
+        with self._file_lock():
+            self._refresh()
+            if resume_id not in self._live_rows():
+                return False
+            self._repair_tail()
+            with open(self.rows_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"deleted": resume_id}) + "\n")
+            return True
+
+    def search(self, query_embedding, top_k=10):
+        """Return the top_k live rows by cosine similarity as [{"id", "score", "metadata"}]."""
+        with self._lock:
+            self._sync()
+            if self._matrix is None:
+                return []
+            live = self._live_rows()
+            if not live:
+                return []
+            query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            scores = np.asarray(self._matrix @ query.astype(self.dtype), dtype=np.float32)
+            # Tombstoned and superseded rows never win
+            mask = np.full(scores.shape[0], -np.inf, dtype=np.float32)
+            live_rows = np.fromiter((row for row in live.values() if row < scores.shape[0]), dtype=np.int64)
+            mask[live_rows] = 0.0
+            scores = scores + mask
+            k = min(top_k, live_rows.shape[0])
+            if k <= 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                {"id": self._ids[row], "score": float(scores[row]), "metadata": self._metadata[row]}
+                for row in top
+            ]
+
+    def compact(self):
+        """Rewrite the index without tombstoned or superseded rows."""
+        with self._file_lock():
+            self._refresh()
+            live = sorted(self._live_rows().items(), key=lambda item: item[1])
+            tmp_vectors = self.vectors_path + ".tmp"
+            tmp_rows = self.rows_path + ".tmp"
+            tmp_chunks = self.chunks_path + ".tmp"
+            chunk_end = 0
+            with open(tmp_vectors, "wb") as vf, open(tmp_rows, "w", encoding="utf-8") as rf, open(tmp_chunks, "wb") as cf:
+                for resume_id, row in live:
+                    vf.write(np.asarray(self._matrix[row]).tobytes())
+                    record = {"id": resume_id, "metadata": self._metadata[row]}
+                    chunks = self._chunks[row]
+                    if chunks is not None and self._chunk_matrix is not None:
+                        start, count, sections = chunks
+                        cf.write(np.asarray(self._chunk_matrix[start:start + count]).tobytes())
+                        record["chunks"] = [chunk_end, count]
+                        record["sections"] = sections
+                        chunk_end += count
+                    rf.write(json.dumps(record) + "\n")
+            removed = len(self._ids) - len(live)
+            self._matrix = None
+            self._chunk_matrix = None
+            os.replace(tmp_vectors, self.vectors_path)
+            os.replace(tmp_chunks, self.chunks_path)
+            os.replace(tmp_rows, self.rows_path)
+            self._reset()
+            self._refresh()
+            return {"rows": len(live), "removed": removed}
+
+    def stats(self):
+        with self._lock:
+            self._sync()
+            return {
+                "rows": len(self._ids),
+                "live": len(self._live_rows()),
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+            }
+
+embedding_index = EmbeddingIndex()
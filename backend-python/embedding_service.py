@@ -0,0 +1,152 @@
+import os
+import time
+import queue
+import bisect
+import threading
+from concurrent.futures import Future
+from models import get_sbert_model
+
+# Texts per SBERT forward pass; a batch is flushed once it holds this many texts
+# or its oldest request has waited SBERT_BATCH_WAIT seconds
+SBERT_BATCH_SIZE = int(os.getenv("SBERT_BATCH_SIZE", "32"))
+SBERT_BATCH_WAIT = float(os.getenv("SBERT_BATCH_WAIT", "0.005"))
+
+# Upper bounds of the batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+class EmbeddingService:
+    """
+    Micro-batching front end to the SBERT model.
+
+    Concurrent encode calls with a few texts each (a resume and a JD, a
+    handful of chunks) are queued, merged into one model.encode call, and
+    each caller gets its own rows back. Calls that already fill a batch are
+    encoded directly on the caller's thread.
+    """
+
+    def __init__(self, batch_size=SBERT_BATCH_SIZE, batch_wait=SBERT_BATCH_WAIT):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        # Counters are only written by the batcher thread (direct calls aside)
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.direct_calls = 0
+        self.batch_sizes = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.encode_seconds = 0.0
+
+    def encode(self, texts):
+        """Embed a list of texts, returning a (len(texts), dim) array in order."""
+        if len(texts) >= self.batch_size:
+            self.direct_calls += 1
+            return self._encode(texts)
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((texts, time.monotonic(), future))
+        return future.result()
+
+    def _encode(self, texts):
+        return get_sbert_model().encode(texts, batch_size=self.batch_size, convert_to_numpy=True)
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, daemon=True, name="sbert-batcher")
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            # Measured from the oldest request, so time spent queued behind a running batch counts
+            deadline = batch[0][1] + self.batch_wait
+            while size < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            started = time.monotonic()
+            try:
+                embeddings = self._encode([text for texts, _, _ in batch for text in texts])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            self._record(batch, size, started)
+            offset = 0
+            for texts, _, future in batch:
+                # Copy so cached embeddings don't keep the whole batch array alive
+                future.set_result(embeddings[offset:offset + len(texts)].copy())
+                offset += len(texts)
+
+    def _record(self, batch, size, started):
+        self.encode_seconds += time.monotonic() - started
+        self.batches += 1
+        self.requests += len(batch)
+        self.texts += size
+        self.batch_sizes[bisect.bisect_left(BATCH_SIZE_BUCKETS, size)] += 1
+        for _, enqueued, _ in batch:
+            self.wait_seconds += started - enqueued
+            self.max_wait_seconds = max(self.max_wait_seconds, started - enqueued)
+
+    def stats(self):
+        labels = [f"<={bound}" for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+        return {
+            "queueDepth": self._queue.qsize(),
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "directCalls": self.direct_calls,
+            "meanBatchSize": round(self.texts / self.batches, 2) if self.batches else None,
+            "batchSizes": dict(zip(labels, self.batch_sizes)),
+            "meanWaitMs": round(1000 * self.wait_seconds / self.requests, 2) if self.requests else None,
+            "maxWaitMs": round(1000 * self.max_wait_seconds, 2),
+            "meanEncodeMs": round(1000 * self.encode_seconds / self.batches, 2) if self.batches else None,
+            "batchSize": self.batch_size,
+            "batchWaitMs": self.batch_wait * 1000,
+        }
+
+embedding_service = EmbeddingService()
+
+def benchmark(concurrency=16, requests=256):
+    """
+    Texts per second for `requests` concurrent two-text encodes (a resume and
+    a JD, as in /api/analyze-resume), each calling the model directly versus
+    going through the batching service.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    resume = " ".join(["Built and operated Python microservices on AWS with Docker and PostgreSQL."] * 20)
+    pairs = [[f"{resume} Candidate {i}.", f"Backend engineer {i}: Python, AWS, Kubernetes."] for i in range(requests)]
+    model = get_sbert_model()
+    model.encode(pairs[0])
+    timings = {}
+    runs = {
+        "direct": lambda pair: model.encode(pair, convert_to_numpy=True),
+        "batched": embedding_service.encode,
+    }
+    for label, encode in runs.items():
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            start = time.perf_counter()
+            list(pool.map(encode, pairs))
+            timings[label] = time.perf_counter() - start
+    return {
+        "textsPerSecond": {label: round(2 * requests / seconds, 1) for label, seconds in timings.items()},
+        "speedup": round(timings["direct"] / timings["batched"], 2),
+        "stats": embedding_service.stats(),
+    }
+
+if __name__ == "__main__":
+    # python embedding_service.py [concurrency] [requests]
+    import sys
+    import json
+    args = [int(arg) for arg in sys.argv[1:3]]
+    print(json.dumps(benchmark(*args), indent=2))
@@ -1,37 +1,17 @@
-import os
-from dotenv import load_dotenv
-import groq
 import re
 import json
+import asyncio
+from llm import groq_chat, groq_chat_stream, MODEL_NAME
+from resume_parser import resume_for_prompt
+from conversation import compact_history, prefetch_summary, fit_prompt
 
-# Load environment variables
-load_dotenv()
-API_KEY = os.getenv("GROQ_API_KEY")
-MODEL_NAME = "meta-llama/llama-4-scout-17b-16e-instruct"
-
-groq_client = groq.Groq(api_key=API_KEY)
-
-def groq_chat(prompt, system_prompt=None, max_tokens=512, temperature=0.7):
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    messages.append({"role": "user", "content": prompt})
-    response = groq_client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=messages,
-        max_tokens=max_tokens,
-        temperature=temperature
-    )
-    content = response.choices[0].message.content
-    return content if content is not None else ""
-
-def generate_questions(resume_info):
+async def generate_questions(resume_info):
     prompt = (
         f"You are a professional talent acquisition specialist conducting an interview for an AI role. "
         f"Given this resume info: {resume_info}, generate 5 technical and behavioral interview questions for a job interview. "
         f"Questions should be short, relevant, and not boring. Return only the questions as a numbered list."
     )
-    text = groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.") or ""
+    text = await groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.") or ""
     questions = re.findall(r"\d+\.\s*(.*?\?)", text)
     if not questions:
         questions = [q.strip('- ').strip() for q in text.strip().split('\n') if q.strip() and '?' in q]
@@ -41,7 +21,7 @@ def truncate_feedback(feedback, max_sentences=3):
     sentences = re.split(r'(?<=[.!?]) +', feedback)
     return ' '.join(sentences[:max_sentences]).strip()
 
-def evaluate_answer(payload):
+async def evaluate_answer(payload):
     question = payload.get("question")
     answer = payload.get("answer")
     prompt = (
@@ -53,7 +33,7 @@ def evaluate_answer(payload):
         "Respond ONLY with a valid JSON object with keys: score, feedback, strengths, improvements, followUpQuestions. "
         "Do NOT summarize the whole interview. Do NOT generate a report. Do NOT include any extra text, markdown, or a full report."
     )
-    text = groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.", temperature=0.5) or ""
+    text = await groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.", temperature=0.5) or ""
     print('Groq raw response:', text)
     # Try to extract JSON
     result = extract_json_from_text(text)
@@ -84,21 +64,25 @@ def extract_json_from_text(text):
                 return None
     return None
 
-def init_cv_question_stream(cv, user_intro, client=None, model=MODEL_NAME):
+async def init_cv_question_stream(cv, user_intro, client=None, model=MODEL_NAME):
+    cv = await resume_for_prompt(cv)
     prompt = f"""You are professional talent acquisition specialist conducting an interview for an AI role.\nYour task is to start a conversation with the candidate after he introduced himself.\nYou have access to the candidate's CV.\nThe question should be short and not boring.\nThe text you will generate will be read by a text-to-speech engine, so you can add vocalized text if you want.\nYou should not explain the beginning of the conversation or the context of the question.\nTalk directly to the candidate.\nBe kind, nice, helpful, and professional.\nYou need to keep it a natural conversation.\nYou need to be human-like, and to interact with the last thing that the candidate said.\nCandidate Introduction: {user_intro}\nCV: {cv}\n\nConversation Start: """
-    return groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.")
+    return await groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.", cache=False)
 
-def stream_next_cv_question(client=None, model=MODEL_NAME, cv=None, chat_history=None):
+async def stream_next_cv_question(client=None, model=MODEL_NAME, cv=None, chat_history=None):
+    cv = await resume_for_prompt(cv or "")
     prompt = f"""You are professional talent acquisition specialist conducting an interview for an AI role.\nYour task is to continue the conversation with the candidate after he answered the previous question.\nContinue the conversation and do not begin a new one.\nYou have access to the candidate's CV.\nThe question should be short and not boring.\nThe question should not be long!\nThe text you will generate will be read by a text-to-speech engine, so you can add vocalized text if you want.\nYou should not explain the beginning of the conversation or the context of the question.\nDon't repeat previous questions.\nBefore asking the question, give a natural transition from the previous answer.\nDon't explain anything, and don't give any notes.\nTalk directly to the candidate.\nBe kind, nice, helpful, and professional.\nYou need to keep it a natural conversation.\nChat History: {chat_history}\nCV: {cv}\n\nConversation Continuity: """
-    return groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.")
+    return await groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.", cache=False)
 
-def reformulate_question(client=None, model=MODEL_NAME, question_data=None):
+async def reformulate_question(client=None, model=MODEL_NAME, question_data=None):
     if not question_data:
         return "No question data provided."
     prompt = f"""You are a professional technical interviewer conducting an interview for an AI role.\nYour task is to reformulate the following technical question to make it more conversational and suitable for a verbal interview.\nThe reformulated question should be clear, concise, and natural sounding when read aloud by a text-to-speech system.\nDo not change the technical content or difficulty of the question.\n\nOriginal Question: {question_data['question']}\n\nTopic: {question_data.get('main_subject', '')}\nDifficulty: {question_data.get('difficulty', '')}\n\nPlease provide only the reformulated question without any additional text, explanations, or context.\n"""
-    return groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.")
+    return await groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.")
 
-def generate_interview_questions(resume_text):
+async def generate_interview_questions(resume_text):
+    # Prompts carry the compact parsed digest rather than the raw OCR text
+    resume_text = await resume_for_prompt(resume_text)
     prompt = (
         "You are a professional technical interviewer. "
         "Given the following resume, generate 6 diverse interview questions for a technical interview. "
@@ -106,7 +90,7 @@ def generate_interview_questions(resume_text):
         "Questions should be clear, relevant, and not generic. Return ONLY a JSON array of 6 questions.\n"
         f"Resume: {resume_text}"
     )
-    text = groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.") or ""
+    text = await groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.") or ""
     print('Groq raw questions:', text)
     try:
         questions = json.loads(text)
@@ -117,7 +101,8 @@ def generate_interview_questions(resume_text):
     lines = [l.strip('- ').strip() for l in text.split('\n') if '?' in l]
     return lines[:6]
 
-def evaluate_single_answer(question, answer, resume_text):
+async def evaluate_single_answer(question, answer, resume_text):
+    resume_text = await resume_for_prompt(resume_text)
     prompt = (
         "You are an expert technical interviewer.\n"
         f"Resume: {resume_text}\n"
@@ -128,7 +113,7 @@ def evaluate_single_answer(question, answer, resume_text):
         "Respond ONLY with a valid JSON object with keys: score, feedback, strengths, improvements, followUpQuestions. "
         "Do NOT summarize the whole interview. Do NOT generate a report. Do NOT include any extra text, markdown, or a full report."
     )
-    text = groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.", temperature=0.5) or ""
+    text = await groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.", temperature=0.5) or ""
     print('Groq raw evaluation:', text)
     result = extract_json_from_text(text)
     if result and 'feedback' in result:
@@ -144,8 +129,131 @@ def evaluate_single_answer(question, answer, resume_text):
         "raw": text.strip()
     }
 
-def generate_final_report(interview_data, user_name=None):
-    prompt = (
+def failed_evaluation(error):
+    return {
+        "score": None,
+        "feedback": "",
+        "strengths": None,
+        "improvements": None,
+        "followUpQuestions": None,
+        "error": error,
+    }
+
+async def evaluate_answers_concurrent(qa_pairs, resume_text):
+    """
+    Evaluate every answer at once, one request per answer. The shared LLM rate
+    limiter paces the fan-out, so wall-clock time is close to one evaluation
+    while the RPM/TPM budget holds.
+    """
+    results = await asyncio.gather(
+        *(evaluate_single_answer(qa["question"], qa["answer"], resume_text) for qa in qa_pairs),
+        return_exceptions=True,
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    # Cancellation, or every item failing (e.g. rate limited), fails the whole batch
+    for error in errors:
+        if not isinstance(error, Exception) or len(errors) == len(results):
+            raise error
+    return [failed_evaluation(str(r)) if isinstance(r, Exception) else r for r in results]
+
+def build_batch_evaluation_prompt(resume_text, qa_pairs):
+    items = [{"id": i, "question": qa["question"], "answer": qa["answer"]} for i, qa in enumerate(qa_pairs)]
+    return (
+        "You are an expert technical interviewer.\n"
+        f"Resume: {resume_text}\n"
+        f"Interview Q&A items: {json.dumps(items)}\n"
+        "Evaluate EACH answer on its own for clarity, relevance, and depth. "
+        "For every item provide a score out of 10 and a short feedback string (2-3 sentences). "
+        "Respond ONLY with a valid JSON array containing one object per item, in the same order, with keys: "
+        "id, score, feedback, strengths, improvements, followUpQuestions. "
+        "Do NOT summarize the whole interview. Do NOT include any extra text or markdown."
+    )
+
+def extract_json_array_from_text(text):
+    if not text:
+        return None
+    try:
+        result = json.loads(text)
+    except Exception:
+        match = re.search(r'\[[\s\S]*\]', text)
+        if not match:
+            return None
+        try:
+            result = json.loads(match.group(0))
+        except Exception:
+            return None
+    return result if isinstance(result, list) else None
+
+def validate_evaluation(item):
+    """Normalized evaluation dict, or None if the item is missing a usable score or feedback."""
+    if not isinstance(item, dict):
+        return None
+    score = item.get("score")
+    if isinstance(score, str):
+        try:
+            score = float(score.split("/")[0])
+        except ValueError:
+            return None
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 10:
+        return None
+    feedback = item.get("feedback")
+    if not isinstance(feedback, str) or not feedback.strip():
+        return None
+    return {
+        "score": score,
+        "feedback": truncate_feedback(feedback.strip()),
+        "strengths": item.get("strengths"),
+        "improvements": item.get("improvements"),
+        "followUpQuestions": item.get("followUpQuestions"),
+    }
+
+async def evaluate_answers_packed(qa_pairs, resume_text):
+    """
+    Evaluate all answers with a single structured-JSON prompt, so the resume is
+    sent once. Items that come back missing or malformed are re-evaluated
+    individually and concurrently.
+    """
+    prompt_resume = await resume_for_prompt(resume_text)
+    prompt = build_batch_evaluation_prompt(prompt_resume, qa_pairs)
+    max_tokens = min(4096, 200 + 250 * len(qa_pairs))
+    text = await groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.", max_tokens=max_tokens, temperature=0.5) or ""
+    print('Groq raw batch evaluation:', text)
+    results = [None] * len(qa_pairs)
+    for position, item in enumerate(extract_json_array_from_text(text) or []):
+        index = item.get("id", position) if isinstance(item, dict) else position
+        if isinstance(index, int) and 0 <= index < len(results) and results[index] is None:
+            results[index] = validate_evaluation(item)
+    failed = [i for i, result in enumerate(results) if result is None]
+    if failed:
+        print(f"Batch evaluation: retrying {len(failed)} of {len(qa_pairs)} items individually")
+        retried = await evaluate_answers_concurrent([qa_pairs[i] for i in failed], resume_text)
+        for i, result in zip(failed, retried):
+            results[i] = result
+    return results
+
+EVALUATION_MODES = {"concurrent": evaluate_answers_concurrent, "packed": evaluate_answers_packed}
+
+async def evaluate_interview(qa_pairs, resume_text, mode="concurrent", user_name=None, include_report=True):
+    """
+    Evaluate every answer and write the final report in one round trip. The
+    report is generated alongside the evaluations rather than after them.
+    """
+    evaluate = EVALUATION_MODES[mode](qa_pairs, resume_text)
+    if include_report:
+        report_data = [{"question": qa["question"], "answer": qa["answer"]} for qa in qa_pairs]
+        evaluations, report = await asyncio.gather(evaluate, generate_final_report(report_data, user_name))
+    else:
+        evaluations, report = await evaluate, None
+    scores = [e["score"] for e in evaluations if isinstance(e.get("score"), (int, float))]
+    return {
+        "evaluations": evaluations,
+        "averageScore": round(sum(scores) / len(scores), 2) if scores else None,
+        "report": report,
+        "mode": mode,
+    }
+
+def build_final_report_prompt(interview_data):
+    return (
         "You are an expert AI interviewer tasked with evaluating a candidate's technical interview performance.\n"
         "Based on the interview questions, expected answers, and the candidate's actual responses, provide a comprehensive evaluation report.\n"
         "Your report should include:\n"
@@ -157,18 +265,27 @@ def generate_final_report(interview_data, user_name=None):
         "Be professional, direct, and constructive. Do NOT repeat words or phrases. Do NOT include the candidate's name. Avoid any kind of duplication in your response.\n"
         f"Interview Data: {json.dumps(interview_data)}"
     )
-    text = groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.") or ""
+
+async def generate_final_report(interview_data, user_name=None):
+    prompt = build_final_report_prompt(interview_data)
+    text = await groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.") or ""
     print('Groq raw report:', text)
     return text.strip()
 
-def next_interview_question(resume_text, chat_history, user_intro=None):
+async def stream_final_report(interview_data, user_name=None):
+    """Yield report tokens as Groq produces them."""
+    prompt = build_final_report_prompt(interview_data)
+    async for token in groq_chat_stream(prompt, system_prompt="You are a helpful AI interview evaluator."):
+        yield token
+
+def build_next_question_prompt(resume_text, recent_history, user_intro=None, summary="", question_number=None):
     total_questions = 7
-    current_question_num = len(chat_history) + 1
-    if user_intro and not chat_history:
+    current_question_num = question_number or len(recent_history) + 1
+    if user_intro and current_question_num == 1:
         intro_part = f"The candidate introduced themselves as: {user_intro}\n"
     else:
         intro_part = ""
-    prompt = (
+    return (
         f"You are a professional technical interviewer conducting a real-time, friendly job interview. "
         f"This interview consists of {total_questions} questions. You are about to ask question number {current_question_num} out of {total_questions}. "
         "Your job is to keep the conversation natural and human-like, as if you are speaking to the candidate in person. "
@@ -180,9 +297,36 @@ def next_interview_question(resume_text, chat_history, user_intro=None):
         "Ask a clear, relevant, and non-generic question. "
         "Return ONLY the brief comment and the next question as plain text, no explanations, no markdown, no JSON.\n"
         f"Resume: {resume_text}\n"
-        f"Previous Q&A: {json.dumps(chat_history)}"
+        + (f"Summary of earlier questions and answers: {summary}\n" if summary else "")
+        + f"Previous Q&A: {json.dumps(recent_history)}"
     )
-    text = groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.") or ""
-    print('Groq next question:', text)
+
+async def prepare_next_question_prompt(resume_text, chat_history, user_intro=None):
+    """
+    Prompt for the next question with bounded size: only the last few turns go
+    in verbatim, older ones as a running summary, trimmed to the token budget.
+    """
+    resume_text = await resume_for_prompt(resume_text)
+    summary, recent = await compact_history(chat_history)
+    prefetch_summary(chat_history)
+    question_number = len(chat_history) + 1
+    return fit_prompt(
+        lambda resume, summary, recent: build_next_question_prompt(resume, recent, user_intro, summary, question_number),
+        resume_text, summary, recent,
+    )
+
+def clean_question(text):
     lines = [l.strip('- ').strip() for l in text.split('\n') if l.strip()]
     return '\n'.join(lines) if lines else 'Can you tell me more about your experience?'
+
+async def next_interview_question(resume_text, chat_history, user_intro=None):
+    prompt = await prepare_next_question_prompt(resume_text, chat_history, user_intro)
+    text = await groq_chat(prompt, system_prompt="You are a helpful AI interview assistant.", cache=False) or ""
+    print('Groq next question:', text)
+    return clean_question(text)
+
+async def stream_next_interview_question(resume_text, chat_history, user_intro=None):
+    """Yield the next question's tokens as Groq produces them; clean_question() the joined text when done."""
+    prompt = await prepare_next_question_prompt(resume_text, chat_history, user_intro)
+    async for token in groq_chat_stream(prompt, system_prompt="You are a helpful AI interview assistant.", cache=False):
+        yield token
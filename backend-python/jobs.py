@@ -0,0 +1,399 @@
+import os
+import json
+import time
+import shutil
+import secrets
+import sqlite3
+import zipfile
+import threading
+import multiprocessing
+
+# Bulk ingestion: a SQLite-backed queue of PDFs processed by local worker processes
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", "jobs.sqlite3")
+JOBS_DIR = os.getenv("JOBS_DIR", "jobs")
+# Worker processes started with the app. Off by default: every uvicorn worker runs
+# the startup hook, so run them once per host with `python jobs.py worker N` instead
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "0"))
+# Seconds a claimed item may run before another worker takes it over (the worker is presumed dead)
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_MAX_FILE_BYTES = int(os.getenv("JOB_MAX_FILE_BYTES", str(20 * 1024 * 1024)))
+# Server-side directories may only be imported from under this root (disabled when unset)
+JOBS_IMPORT_ROOT = os.getenv("JOBS_IMPORT_ROOT")
+JOB_POLL_INTERVAL = 1.0
+
+class JobStore:
+    """
+    Durable job queue in SQLite, shared by the web process and the workers.
+
+    Each job is one job description plus many items (PDF files on disk).
+    Workers claim items with a lease; an item whose lease expires (its worker
+    crashed or was killed) is handed to the next worker, up to
+    JOB_MAX_ATTEMPTS attempts, so a restart resumes where processing stopped.
+    """
+
+    def __init__(self, path=JOBS_DB_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, job_description TEXT NOT NULL, created_at REAL NOT NULL, cancelled INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_items ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, filename TEXT NOT NULL, path TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_until REAL, "
+            "result TEXT, error TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status, lease_until)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS job_items_job ON job_items (job_id, status)")
+
+    def create(self, job_id, job_description, items):
+        """Enqueue a job; items are (filename, path) pairs."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO jobs (id, job_description, created_at) VALUES (?, ?, ?)", (job_id, job_description, now)
+                )
+                self._conn.executemany(
+                    "INSERT INTO job_items (job_id, filename, path, status, updated_at) VALUES (?, ?, ?, 'queued', ?)",
+                    [(job_id, filename, path, now) for filename, path in items],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, worker):
+        """Lease the next queued (or abandoned) item to a worker, or return None."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Abandoned items that already used up their attempts are given up on
+                self._conn.execute(
+                    "UPDATE job_items SET status = 'error', error = 'Worker stopped while processing', updated_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, JOB_MAX_ATTEMPTS),
+                )
+                self._conn.execute(
+                    "UPDATE job_items SET status = 'cancelled', updated_at = ? WHERE status = 'running' AND lease_until < ? "
+                    "AND job_id IN (SELECT id FROM jobs WHERE cancelled = 1)",
+                    (now, now),
+                )
+                row = self._conn.execute(
+                    "SELECT job_items.id, job_items.job_id, filename, path, attempts, job_description FROM job_items "
+                    "JOIN jobs ON jobs.id = job_items.job_id "
+                    "WHERE (status = 'queued' OR (status = 'running' AND lease_until < ?)) AND jobs.cancelled = 0 "
+                    "ORDER BY job_items.id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE job_items SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                        "updated_at = ? WHERE id = ?",
+                        (worker, now + JOB_LEASE_SECONDS, now, row["id"]),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dict(row) if row is not None else None
+
+    def is_finished(self, job_id):
+        """True once a job exists and none of its items are queued or running."""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is None:
+                return False
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM job_items WHERE job_id = ? AND status IN ('queued', 'running')", (job_id,)
+            ).fetchone()[0]
+        return pending == 0
+
+    def complete(self, item_id, result):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_items SET status = 'done', result = ?, error = NULL, updated_at = ? WHERE id = ? AND status = 'running'",
+                (json.dumps(result), time.time(), item_id),
+            )
+
+    def fail(self, item_id, error, attempts):
+        """Requeue a failed item, or mark it as errored once it has used up its attempts. Returns the new status."""
+        status = "error" if attempts >= JOB_MAX_ATTEMPTS else "queued"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_items SET status = ?, error = ?, updated_at = ? WHERE id = ? AND status = 'running'",
+                (status, error, time.time(), item_id),
+            )
+        return status
+
+    def cancel(self, job_id):
+        with self._lock:
+            if self._conn.execute("UPDATE jobs SET cancelled = 1 WHERE id = ?", (job_id,)).rowcount == 0:
+                return False
+            self._conn.execute(
+                "UPDATE job_items SET status = 'cancelled', updated_at = ? WHERE job_id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+        return True
+
+    def progress(self, job_id):
+        with self._lock:
+            job = self._conn.execute("SELECT created_at, cancelled FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        total = sum(counts.values())
+        finished = counts.get("done", 0) + counts.get("error", 0) + counts.get("cancelled", 0)
+        if job["cancelled"]:
+            status = "cancelled" if finished == total else "cancelling"
+        elif finished == total:
+            status = "done"
+        else:
+            status = "running" if finished or counts.get("running") else "queued"
+        return {
+            "jobId": job_id,
+            "status": status,
+            "total": total,
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("error", 0),
+            "cancelled": counts.get("cancelled", 0),
+            "percent": round(100 * finished / total, 1) if total else 100.0,
+            "createdAt": job["created_at"],
+        }
+
+    def results(self, job_id):
+        """Per-file results of a job, best ATS score first; unfinished and failed files last."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename, status, result, error FROM job_items WHERE job_id = ? ORDER BY id", (job_id,)
+            ).fetchall()
+        results = []
+        for row in rows:
+            entry = {"filename": row["filename"], "status": row["status"], "error": row["error"]}
+            if row["result"]:
+                entry.update(json.loads(row["result"]))
+            results.append(entry)
+        results.sort(key=lambda r: r.get("atsScore") if r.get("atsScore") is not None else -1, reverse=True)
+        return results
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM job_items GROUP BY status").fetchall())
+            jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {"jobs": jobs, "items": counts, "workers": len(_workers)}
+
+_store = None
+
+def get_job_store():
+    global _store
+    if _store is None:
+        _store = JobStore()
+    return _store
+
+def iter_zip_pdfs(fileobj):
+    """(name, bytes) of every PDF in a zip archive, skipping entries over the size cap."""
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(".pdf"):
+                continue
+            if info.file_size > JOB_MAX_FILE_BYTES:
+                print(f"Skipping {info.filename}: larger than {JOB_MAX_FILE_BYTES} bytes")
+                continue
+            yield info.filename, archive.read(info)
+
+def iter_directory_pdfs(directory):
+    """(relative path, bytes) of every PDF under a directory, in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.lower().endswith(".pdf") and os.path.getsize(path) <= JOB_MAX_FILE_BYTES:
+                with open(path, "rb") as f:
+                    yield os.path.relpath(path, directory), f.read()
+
+def resolve_import_directory(directory):
+    """The real path of a server-side directory if it lies under JOBS_IMPORT_ROOT, else None."""
+    if not JOBS_IMPORT_ROOT:
+        return None
+    root = os.path.realpath(JOBS_IMPORT_ROOT)
+    path = os.path.realpath(os.path.join(root, directory))
+    if os.path.commonpath([root, path]) != root or not os.path.isdir(path):
+        return None
+    return path
+
+def submit_job(job_description, documents):
+    """
+    Write the (filename, pdf bytes) documents to the job directory one by one
+    and enqueue them. Returns (job_id, number of files), or (None, 0) if
+    there were no documents.
+    """
+    job_id = secrets.token_urlsafe(12)
+    job_dir = os.path.join(JOBS_DIR, job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    items = []
+    try:
+        for filename, pdf_bytes in documents:
+            path = os.path.join(job_dir, f"{len(items):06d}.pdf")
+            with open(path, "wb") as f:
+                f.write(pdf_bytes)
+            items.append((filename, path))
+        if items:
+            get_job_store().create(job_id, job_description, items)
+    except BaseException:
+        # e.g. a corrupt zip part-way through: don't leave the files written so far behind
+        shutil.rmtree(job_dir, ignore_errors=True)
+        raise
+    if not items:
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return None, 0
+    return job_id, len(items)
+
+def remove_item_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def cleanup_job(job_id, store=None):
+    """Delete a job's directory once all of its items are done, failed or cancelled."""
+    store = store or get_job_store()
+    if store.is_finished(job_id):
+        shutil.rmtree(os.path.join(JOBS_DIR, job_id), ignore_errors=True)
+        return True
+    return False
+
+def cancel_job(job_id):
+    """Cancel a job's queued items; its files go now, or when its running items finish."""
+    store = get_job_store()
+    if not store.cancel(job_id):
+        return False
+    cleanup_job(job_id, store)
+    return True
+
+def sweep_job_dirs(store):
+    """
+    Remove directories of finished jobs that were left behind, e.g. items
+    given up on after their worker died. Directories without a job row are
+    submissions still being written and are left alone.
+    """
+    if not os.path.isdir(JOBS_DIR):
+        return
+    for job_id in os.listdir(JOBS_DIR):
+        cleanup_job(job_id, store)
+
+def process_item(item):
+    """
+    OCR, embed, score and parse one PDF with the same functions as
+    /api/analyze-resume, and add it to the candidate index.
+    """
+    # Imported on first use so run_worker's settings apply before the OCR and model modules load
+    from utils import get_resume_artifacts
+    from scoring import score_resume
+    from resume_parser import get_resume_digest
+    from cache import content_hash
+    from embedding_index import embedding_index
+
+    with open(item["path"], "rb") as f:
+        pdf_bytes = f.read()
+    artifacts = get_resume_artifacts(pdf_bytes)
+    text = artifacts["text"]
+    if not text:
+        return {"empty": True, "atsScore": None}
+    resume_id = content_hash(pdf_bytes)
+    if resume_id not in embedding_index or (artifacts.get("chunkSections") and embedding_index.get_chunks(resume_id) is None):
+        embedding_index.add(
+            resume_id, artifacts["embedding"], {"filename": item["filename"]},
+            artifacts.get("chunkSections"), artifacts.get("chunkEmbeddings"),
+        )
+    scores = score_resume(text, item["job_description"], artifacts)
+    digest = get_resume_digest(text)
+    return {
+        "empty": False,
+        "resumeId": resume_id,
+        "atsScore": round(scores["score"] * 100, 2),
+        "sectionScores": {section: round(score * 100, 2) for section, score in scores["sections"].items()},
+        "name": digest.name,
+        "emails": digest.contacts.emails,
+        "skills": digest.skills,
+    }
+
+def run_worker(worker_id, stop_event=None):
+    """Claim and process items until stopped; models are loaded once per worker and reused."""
+    # The worker processes are the parallelism: OCR inline instead of a nested process pool
+    os.environ["OCR_WORKERS"] = "1"
+    store = JobStore()
+    print(f"Job worker {worker_id} started")
+    while stop_event is None or not stop_event.is_set():
+        item = store.claim(worker_id)
+        if item is None:
+            sweep_job_dirs(store)
+            time.sleep(JOB_POLL_INTERVAL)
+            continue
+        try:
+            store.complete(item["id"], process_item(item))
+            finished = True
+        except Exception as e:
+            print(f"Job worker {worker_id}: error processing {item['filename']}: {str(e)}")
+            finished = store.fail(item["id"], str(e), item["attempts"] + 1) == "error"
+        # PDFs are only kept until their item can no longer be retried
+        if finished:
+            remove_item_file(item["path"])
+            cleanup_job(item["job_id"], store)
+
+_workers = []
+_stop_event = None
+
+def start_workers(count=JOB_WORKERS):
+    global _stop_event
+    if _workers or count <= 0:
+        return
+    context = multiprocessing.get_context("spawn")
+    _stop_event = context.Event()
+    for i in range(count):
+        worker_id = f"{os.getpid()}-{i}"
+        process = context.Process(target=run_worker, args=(worker_id, _stop_event), daemon=True, name=f"job-worker-{i}")
+        process.start()
+        _workers.append(process)
+
+def stop_workers(timeout=5):
+    """Ask workers to stop after their current item; an interrupted item is resumed by the next worker."""
+    if _stop_event is not None:
+        _stop_event.set()
+    for process in _workers:
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+    _workers.clear()
+
+if __name__ == "__main__":
+    # python jobs.py worker [processes]
+    # python jobs.py submit <directory or .zip> <job description file>
+    import sys
+    if len(sys.argv) >= 2 and sys.argv[1] == "worker":
+        start_workers(int(sys.argv[2]) if len(sys.argv) > 2 else 1)
+        try:
+            for process in list(_workers):
+                process.join()
+        except KeyboardInterrupt:
+            stop_workers()
+    elif len(sys.argv) == 4 and sys.argv[1] == "submit":
+        with open(sys.argv[3], encoding="utf-8") as f:
+            job_description = f.read()
+        source = sys.argv[2]
+        if source.lower().endswith(".zip"):
+            with open(source, "rb") as archive:
+                job_id, count = submit_job(job_description, iter_zip_pdfs(archive))
+        else:
+            job_id, count = submit_job(job_description, iter_directory_pdfs(source))
+        print(json.dumps({"jobId": job_id, "files": count}))
+    else:
+        sys.exit("usage: python jobs.py worker [processes] | python jobs.py submit <directory|zip> <job description file>")
@@ -0,0 +1,105 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from models import get_nlp
+from nlp_service import nlp_service
+from skills import SKILLS, ALIASES, CASE_SENSITIVE_SKILLS, canonical_skill
+from utils import extract_keywords, preprocess_text
+
+KEYWORD_CACHE_SIZE = int(os.getenv("KEYWORD_CACHE_SIZE", "512"))
+# Novel (out-of-vocabulary) JD phrases taken from KeyBERT on the slow path
+NOVEL_KEYWORDS_TOP_N = int(os.getenv("NOVEL_KEYWORDS_TOP_N", "20"))
+
+_matchers = None
+_matchers_lock = threading.Lock()
+
+def get_keyword_matchers():
+    """
+    PhraseMatchers over the skill vocabulary, compiled once: one on lemmas of
+    lowercased text (so "microservice" and "REST API" match their plural
+    vocabulary entries) and one on exact casing for skills that are also
+    common words.
+    """
+    global _matchers
+    if _matchers is None:
+        with _matchers_lock:
+            if _matchers is None:
+                from spacy.matcher import PhraseMatcher
+                nlp = get_nlp()
+                lemma_matcher = PhraseMatcher(nlp.vocab, attr="LEMMA")
+                exact_matcher = PhraseMatcher(nlp.vocab, attr="ORTH")
+                terms = [t for t in list(SKILLS) + list(ALIASES) if t not in CASE_SENSITIVE_SKILLS]
+                patterns = nlp_service.pipe([t.lower() for t in terms], "lemma")
+                for term, pattern in zip(terms, patterns):
+                    lemma_matcher.add(canonical_skill(term), [pattern])
+                for term in CASE_SENSITIVE_SKILLS:
+                    exact_matcher.add(term, [nlp.make_doc(term)])
+                _matchers = (lemma_matcher, exact_matcher)
+    return _matchers
+
+def find_skills(text):
+    """Canonical vocabulary skills mentioned in text, in order of first appearance."""
+    nlp = get_nlp()
+    lemma_matcher, exact_matcher = get_keyword_matchers()
+    found = {}
+    # Same normalization as preprocess_text: lowercase, then lemmatize
+    lower_doc = nlp_service.process(text.lower(), "lemma")
+    exact_doc = nlp.make_doc(text)
+    for doc, matcher in ((lower_doc, lemma_matcher), (exact_doc, exact_matcher)):
+        for match_id, start, _ in matcher(doc):
+            skill = nlp.vocab.strings[match_id]
+            start_char = doc[start].idx
+            if skill not in found or start_char < found[skill]:
+                found[skill] = start_char
+    return sorted(found, key=found.get)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def cached(kind, text, compute):
+    """LRU cache keyed by a hash of the text, shared by the skill and novel-phrase lookups."""
+    key = kind + ":" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    value = compute(text)
+    with _cache_lock:
+        _cache[key] = value
+        while len(_cache) > KEYWORD_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return value
+
+def novel_keywords(job_description):
+    """KeyBERT phrases of the JD that the skill vocabulary does not cover (slow: embeds every candidate phrase)."""
+    phrases = extract_keywords(job_description, top_n=NOVEL_KEYWORDS_TOP_N)
+    known = {skill.lower() for skill in cached("skills", job_description, find_skills)}
+    return [p for p in phrases if canonical_skill(p).lower() not in known]
+
+def keyword_gap(resume_text, job_description, include_novel=False):
+    """
+    Skills the job description asks for, split into those the resume mentions
+    and those it is missing. JD keyword sets are cached per job description.
+
+    Returns:
+        dict: {"matched": [...], "missing": [...], "coverage": float}, plus
+        "novel": {"matched": [...], "missing": [...]} when include_novel is set
+    """
+    jd_skills = cached("skills", job_description, find_skills)
+    resume_skills = set(cached("skills", resume_text, find_skills))
+    matched = [skill for skill in jd_skills if skill in resume_skills]
+    missing = [skill for skill in jd_skills if skill not in resume_skills]
+    result = {
+        "matched": matched,
+        "missing": missing,
+        "coverage": round(len(matched) / len(jd_skills), 4) if jd_skills else None,
+    }
+    if include_novel:
+        resume_lemmas = f" {cached('lemmas', resume_text, preprocess_text)} "
+        novel = cached("novel", job_description, novel_keywords)
+        result["novel"] = {
+            "matched": [p for p in novel if f" {preprocess_text(p)} " in resume_lemmas],
+            "missing": [p for p in novel if f" {preprocess_text(p)} " not in resume_lemmas],
+        }
+    return result
@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+import httpx
+from dotenv import load_dotenv
+from llm_cache import llm_cache, cache_key
+from scheduler import run_in_stage, StageOverloaded
+
+load_dotenv()
+API_KEY = os.getenv("GROQ_API_KEY")
+MODEL_NAME = "meta-llama/llama-4-scout-17b-16e-instruct"
+# Point at a local stub server in tests, e.g. http://127.0.0.1:8081/v1
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+# Limits of our Groq tier: requests and tokens per minute
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "30000"))
+
+class LLMError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+class LLMRateLimitError(LLMError):
+    """The rate-limit budget or Groq itself refused the call; retry after retry_after seconds."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message, status_code=429)
+        self.retry_after = retry_after
+
+class LLMTimeoutError(LLMError):
+    pass
+
+class TokenBucket:
+    """
+    Process-wide token bucket refilled at rate_per_minute.
+
+    Callers reserve tokens up front and sleep off any deficit, so bursts
+    queue in arrival order instead of failing.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount):
+        """Take amount tokens and return how long the caller must wait before using them."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+request_bucket = TokenBucket(GROQ_RPM)
+token_bucket = TokenBucket(GROQ_TPM)
+
+stats = {
+    "calls": 0,
+    "retries": 0,
+    "errors": 0,
+    "promptTokens": 0,
+    "completionTokens": 0,
+    "rateLimitWaitSeconds": 0.0,
+}
+
+_client = None
+_client_loop = None
+
+def get_http_client():
+    """Pooled HTTP client for the running event loop."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            base_url=GROQ_BASE_URL,
+            headers={"Authorization": f"Bearer {API_KEY}"},
+            limits=httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS),
+        )
+        _client_loop = loop
+    return _client
+
+async def close_http_client():
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+def estimate_tokens(text):
+    # Roughly 4 characters per token for English text
+    return len(text) // 4 + 1
+
+def build_messages(prompt, system_prompt=None):
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+async def acquire_budget(estimated_tokens, deadline):
+    """Wait for room in the request and token budgets, or fail fast if it would miss the deadline."""
+    wait = max(request_bucket.reserve(1), token_bucket.reserve(estimated_tokens))
+    if time.monotonic() + wait > deadline:
+        request_bucket.refund(1)
+        token_bucket.refund(estimated_tokens)
+        raise LLMRateLimitError("LLM rate-limit budget exhausted, try again shortly", retry_after=round(wait, 1))
+    if wait:
+        stats["rateLimitWaitSeconds"] += wait
+        await asyncio.sleep(wait)
+
+def retry_delay(attempt, response=None):
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            pass
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+
+async def send_with_retries(payload, deadline, stream=False):
+    """
+    POST a chat completion request, retrying 429/5xx and connection errors
+    with jittered backoff until the deadline. With stream=True the returned
+    response body has not been read yet and must be closed by the caller.
+    """
+    client = get_http_client()
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            stats["errors"] += 1
+            raise LLMTimeoutError("LLM call exceeded its deadline")
+        response = None
+        try:
+            request = client.build_request("POST", "/chat/completions", json=payload, timeout=remaining)
+            response = await client.send(request, stream=stream)
+        except httpx.TimeoutException:
+            stats["errors"] += 1
+            raise LLMTimeoutError("LLM call exceeded its deadline")
+        except httpx.TransportError as e:
+            if attempt == LLM_MAX_RETRIES:
+                stats["errors"] += 1
+                raise LLMError(f"LLM connection error: {str(e)}")
+        if response is not None and response.status_code < 400:
+            return response
+        if response is not None and stream:
+            await response.aread()
+            await response.aclose()
+        if response is not None and response.status_code != 429 and response.status_code < 500:
+            stats["errors"] += 1
+            raise LLMError(f"LLM request failed ({response.status_code}): {response.text}", status_code=response.status_code)
+        if attempt == LLM_MAX_RETRIES:
+            stats["errors"] += 1
+            if response.status_code == 429:
+                raise LLMRateLimitError("Groq rate limit exceeded", retry_after=retry_delay(attempt, response))
+            raise LLMError(f"LLM request failed ({response.status_code}): {response.text}", status_code=response.status_code)
+        stats["retries"] += 1
+        await asyncio.sleep(min(retry_delay(attempt, response), max(deadline - time.monotonic(), 0)))
+
+def record_usage(estimated, usage):
+    prompt_tokens = usage.get("prompt_tokens", 0)
+    completion_tokens = usage.get("completion_tokens", 0)
+    stats["promptTokens"] += prompt_tokens
+    stats["completionTokens"] += completion_tokens
+    if usage:
+        # Give back what the estimate over-reserved
+        token_bucket.refund(max(estimated - prompt_tokens - completion_tokens, 0))
+    return {"promptTokens": prompt_tokens, "completionTokens": completion_tokens}
+
+async def cache_get(key):
+    """llm_cache.get, on the io stage when the backend touches the disk; a busy stage counts as a miss."""
+    if not getattr(llm_cache.backend, "blocking", False):
+        return llm_cache.get(key)
+    try:
+        return await run_in_stage("io", llm_cache.get, key)
+    except StageOverloaded:
+        return None
+
+async def cache_put(key, value):
+    if not getattr(llm_cache.backend, "blocking", False):
+        llm_cache.put(key, value)
+        return
+    try:
+        await run_in_stage("io", llm_cache.put, key, value)
+    except StageOverloaded:
+        pass
+
+async def chat_completion(messages, max_tokens=512, temperature=0.7, model=MODEL_NAME, timeout=None, cache=True):
+    """
+    Call the chat completions API with a deadline, jittered retries on 429/5xx
+    and the shared rate-limit budget. Identical calls are served from the
+    response cache unless cache=False (conversational routes).
+
+    Returns:
+        dict: {"content": str, "usage": {"promptTokens": int, "completionTokens": int}, "cached": bool}
+    """
+    key = cache_key(model, messages, max_tokens, temperature) if cache else None
+    if key:
+        cached = await cache_get(key)
+        if cached is not None:
+            return {"content": cached["content"], "usage": cached["usage"], "cached": True}
+    started = time.monotonic()
+    deadline = time.monotonic() + (timeout or LLM_TIMEOUT)
+    estimated = sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+    await acquire_budget(estimated, deadline)
+    stats["calls"] += 1
+    payload = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+    response = await send_with_retries(payload, deadline)
+
+    data = response.json()
+    content = data["choices"][0]["message"].get("content") or ""
+    usage = record_usage(estimated, data.get("usage") or {})
+    if key and content:
+        await cache_put(key, {"content": content, "usage": usage, "latency": time.monotonic() - started})
+    return {"content": content, "usage": usage, "cached": False}
+
+async def stream_chat_completion(messages, max_tokens=512, temperature=0.7, model=MODEL_NAME, timeout=None, cache=True):
+    """
+    Streaming variant of chat_completion: an async generator of content
+    tokens as the model produces them. Retries only happen before the first
+    token; a cached response is yielded as a single chunk.
+    """
+    key = cache_key(model, messages, max_tokens, temperature) if cache else None
+    if key:
+        cached = await cache_get(key)
+        if cached is not None:
+            yield cached["content"]
+            return
+    started = time.monotonic()
+    deadline = time.monotonic() + (timeout or LLM_TIMEOUT)
+    estimated = sum(estimate_tokens(m["content"]) for m in messages) + max_tokens
+    await acquire_budget(estimated, deadline)
+    stats["calls"] += 1
+    payload = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature, "stream": True}
+    response = await send_with_retries(payload, deadline, stream=True)
+    parts = []
+    usage = {}
+    try:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            # Groq reports usage on the last chunk under x_groq, OpenAI under usage
+            usage = chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage") or usage
+            for choice in chunk.get("choices") or []:
+                token = (choice.get("delta") or {}).get("content")
+                if token:
+                    parts.append(token)
+                    yield token
+    except httpx.TimeoutException:
+        stats["errors"] += 1
+        raise LLMTimeoutError("LLM stream stalled past its deadline")
+    finally:
+        await response.aclose()
+    content = "".join(parts)
+    usage = record_usage(estimated, usage)
+    if key and content:
+        await cache_put(key, {"content": content, "usage": usage, "latency": time.monotonic() - started})
+
+async def groq_chat(prompt, system_prompt=None, max_tokens=512, temperature=0.7, timeout=None, cache=True):
+    result = await chat_completion(build_messages(prompt, system_prompt), max_tokens=max_tokens, temperature=temperature, timeout=timeout, cache=cache)
+    return result["content"]
+
+async def groq_chat_stream(prompt, system_prompt=None, max_tokens=512, temperature=0.7, timeout=None, cache=True):
+    async for token in stream_chat_completion(build_messages(prompt, system_prompt), max_tokens=max_tokens, temperature=temperature, timeout=timeout, cache=cache):
+        yield token
+
+def llm_stats():
+    return dict(stats, cache=llm_cache.stats())
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# "memory", "sqlite" or "off"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "1024"))
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+# SQLite hits refresh last_used (the LRU order) at most this often per entry
+LLM_CACHE_TOUCH_INTERVAL = float(os.getenv("LLM_CACHE_TOUCH_INTERVAL", "60"))
+
+def cache_key(model, messages, max_tokens, temperature):
+    prompt_hash = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{model}:{max_tokens}:{temperature}:{prompt_hash}"
+
+class MemoryBackend:
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_entries=LLM_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteBackend:
+    """Cache on local disk, shared by every worker on the host."""
+
+    name = "sqlite"
+    # Lookups hit the disk and may wait on another writer, so callers keep them off the event loop
+    blocking = True
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_SIZE, touch_interval=LLM_CACHE_TOUCH_INTERVAL):
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, last_used FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            # Expired rows are left for the next put to sweep, so a miss never writes
+            if row is None or row[1] < now:
+                return None
+            # A plain read most of the time; only a stale entry takes a write transaction
+            if now - row[2] >= self.touch_interval:
+                with self._conn:
+                    self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            return json.loads(row[0])
+
+    def put(self, key, value, ttl):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+class LLMResponseCache:
+    """
+    Cache of LLM completions keyed on model, prompt hash and sampling parameters.
+
+    Values are {"content", "usage", "latency"}; every hit adds the original
+    call's latency and token usage to the saved counters.
+    """
+
+    def __init__(self, backend, ttl=LLM_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+
+    def get(self, key):
+        if self.backend is None:
+            return None
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.saved_seconds += value.get("latency", 0.0)
+        usage = value.get("usage") or {}
+        self.saved_tokens += usage.get("promptTokens", 0) + usage.get("completionTokens", 0)
+        return value
+
+    def put(self, key, value):
+        if self.backend is not None:
+            self.backend.put(key, value, self.ttl)
+
+    def stats(self):
+        return {
+            "backend": self.backend.name if self.backend is not None else "off",
+            "entries": len(self.backend) if self.backend is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+            "savedSeconds": round(self.saved_seconds, 3),
+            "savedTokens": self.saved_tokens,
+        }
+
+def create_backend(name=LLM_CACHE_BACKEND):
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "memory":
+        return MemoryBackend()
+    return None
+
+llm_cache = LLMResponseCache(create_backend())
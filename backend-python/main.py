@@ -1,13 +1,31 @@
-from fastapi import FastAPI, File, UploadFile, Form, Request
+from fastapi import FastAPI, File, UploadFile, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-from interview import generate_questions, evaluate_answer, init_cv_question_stream, stream_next_cv_question, generate_interview_questions, evaluate_single_answer, generate_final_report, next_interview_question
-from career import career_assistant
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from typing import List, Optional
+from interview import generate_questions, evaluate_answer, init_cv_question_stream, stream_next_cv_question, generate_interview_questions, evaluate_single_answer, generate_final_report, evaluate_interview, EVALUATION_MODES, next_interview_question, stream_final_report, stream_next_interview_question, clean_question
+from career import career_assistant, stream_career_assistant, FALLBACK_RESPONSE
 from report import generate_report, generate_evaluation_report
-from utils import extract_text_from_pdf_ocr, calculate_similarity, extract_name_from_resume
-from speech_to_text import convert_audio_to_text
+from utils import get_resume_artifacts, get_resume_artifacts_batch, encode_text, embed_resumes, extract_name_from_resume
+from scoring import score_resume, score_resumes, rescore_candidates, CANDIDATE_RERANK_FACTOR, BATCH_MAX_RESUMES
+from keywords import keyword_gap
+from speech_to_text import convert_audio_to_text, transcribe_pcm, SpeechSegmenter
+from audio import decode_audio, AUDIO_MAX_BYTES
+from cache import resume_cache, content_hash
+from embedding_index import embedding_index
+from embedding_service import embedding_service
+from models import registry, MODEL_LOADING, MODEL_WARMUP
+from scheduler import run_in_stage, stage_stats, StageOverloaded
+from sessions import session_store
+from jobs import get_job_store, submit_job, cancel_job, iter_zip_pdfs, iter_directory_pdfs, resolve_import_directory, start_workers, stop_workers, JOB_WORKERS, JOB_MAX_FILE_BYTES
+from resume_parser import get_resume_digest
+from llm import LLMError, LLMRateLimitError, LLMTimeoutError, close_http_client, llm_stats
 import os
 import io
+import asyncio
+import csv
+import json
+import inspect
+import itertools
 import logging
 import traceback
 
@@ -26,14 +44,295 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(StageOverloaded)
+async def stage_overloaded_handler(request: Request, exc: StageOverloaded):
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+        content={"error": str(exc)},
+    )
+
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    print(f"LLM error: {str(exc)}")
+    if isinstance(exc, LLMRateLimitError):
+        headers = {"Retry-After": str(int(exc.retry_after or 1))}
+        return JSONResponse(status_code=429, headers=headers, content={"error": "Groq API rate limit exceeded. Please try again shortly."})
+    status_code = 504 if isinstance(exc, LLMTimeoutError) else 502
+    return JSONResponse(status_code=status_code, content={"error": str(exc)})
+
+@app.on_event("startup")
+async def load_models():
+    # Models load after the server starts accepting requests unless MODEL_LOADING=eager/lazy
+    if MODEL_LOADING == "eager":
+        registry.load_all(warmup=MODEL_WARMUP)
+    elif MODEL_LOADING == "background":
+        registry.start_background_load(warmup=MODEL_WARMUP)
+
+@app.on_event("startup")
+async def start_job_workers():
+    start_workers(JOB_WORKERS)
+
+@app.on_event("shutdown")
+async def close_clients():
+    await close_http_client()
+    stop_workers()
+
 @app.post("/api/analyze-resume")
-async def analyze_resume(resume: UploadFile = File(...), job_description: str = Form(...)):
-    # Extract text from PDF (OCR)
+async def analyze_resume(resume: UploadFile = File(...), job_description: str = Form(...), novel_keywords: bool = Form(False)):
+    # Extract text from PDF (text layer first, OCR only for image-only pages).
+    # Repeat uploads of the same file are served from the resume cache.
     resume.file.seek(0)
-    resume_text = extract_text_from_pdf_ocr(resume.file)
-    # Calculate ATS score
-    ats_score = calculate_similarity(resume_text, job_description)
-    return {"atsScore": round(ats_score * 100, 2), "resumeText": resume_text}
+    pdf_bytes = resume.file.read()
+    artifacts = await run_in_stage("ocr", get_resume_artifacts, pdf_bytes)
+    resume_text = artifacts["text"]
+    await run_in_stage("io", index_resume, content_hash(pdf_bytes), artifacts, resume.filename)
+    # Calculate ATS score over every section of the resume, not just its first few hundred tokens
+    # alongside the keyword gap (vocabulary skills in milliseconds; KeyBERT phrases only when asked for)
+    keyword_stage = "embed" if novel_keywords else "nlp"
+    scores, gap = await asyncio.gather(
+        run_in_stage("embed", score_resume, resume_text, job_description, artifacts),
+        run_in_stage(keyword_stage, keyword_gap, resume_text, job_description, include_novel=novel_keywords),
+    )
+    return {
+        "atsScore": round(scores["score"] * 100, 2),
+        "sectionScores": {section: round(score * 100, 2) for section, score in scores["sections"].items()},
+        "requirements": scores["requirements"],
+        "keywordGap": gap,
+        "resumeText": resume_text,
+        "pages": artifacts["pages"],
+    }
+
+def index_resume(resume_id, artifacts, filename):
+    """Keep the resume's embeddings in the candidate search index."""
+    if not artifacts["text"]:
+        return
+    # Rows indexed without window embeddings are re-added so candidate search can score them
+    if resume_id in embedding_index and (not artifacts.get("chunkSections") or embedding_index.get_chunks(resume_id) is not None):
+        return
+    try:
+        embedding_index.add(
+            resume_id, artifacts["embedding"], {"filename": filename},
+            artifacts.get("chunkSections"), artifacts.get("chunkEmbeddings"),
+        )
+    except Exception as e:
+        print(f"Error adding resume to embedding index: {str(e)}")
+
+@app.post("/api/analyze-resumes/batch")
+async def analyze_resumes_batch(
+    job_description: str = Form(...),
+    resumes: Optional[List[UploadFile]] = File(None),
+    resume_texts: Optional[List[str]] = Form(None),
+):
+    """
+    Score many resumes (PDF uploads and/or already-extracted texts) against one
+    job description and return them ranked by ATS score. At most
+    BATCH_MAX_RESUMES resumes of up to JOB_MAX_FILE_BYTES each; anything
+    larger is refused with 413 and belongs in the /api/jobs queue.
+    """
+    try:
+        resumes = resumes or []
+        resume_texts = resume_texts or []
+        if not resumes and not resume_texts:
+            return JSONResponse(status_code=400, content={"error": "Provide resumes or resume_texts"})
+        if len(resumes) + len(resume_texts) > BATCH_MAX_RESUMES:
+            return JSONResponse(
+                status_code=413,
+                content={"error": f"At most {BATCH_MAX_RESUMES} resumes per batch; queue larger sets with POST /api/jobs"},
+            )
+        names = [resume.filename for resume in resumes]
+        pdf_bytes_list = []
+        for resume in resumes:
+            # Never read past the cap, so an oversized upload isn't buffered whole
+            pdf_bytes = await resume.read(JOB_MAX_FILE_BYTES + 1)
+            if len(pdf_bytes) > JOB_MAX_FILE_BYTES:
+                return JSONResponse(
+                    status_code=413,
+                    content={"error": f"{resume.filename} is larger than {JOB_MAX_FILE_BYTES // (1024 * 1024)} MB"},
+                )
+            pdf_bytes_list.append(pdf_bytes)
+        pdf_entries = await run_in_stage("ocr", get_resume_artifacts_batch, pdf_bytes_list)
+        for pdf_bytes, entry, name in zip(pdf_bytes_list, pdf_entries, names):
+            await run_in_stage("io", index_resume, content_hash(pdf_bytes), entry, name)
+        entries = list(pdf_entries)
+        if resume_texts:
+            text_embeddings = await run_in_stage("embed", embed_resumes, resume_texts)
+            entries.extend(dict(embeddings, text=text) for text, embeddings in zip(resume_texts, text_embeddings))
+            names.extend(f"text-{i}" for i in range(len(resume_texts)))
+        # Same section-level score as /api/analyze-resume; cached resumes only need the JD encoded
+        scores = await run_in_stage("embed", score_resumes, entries, job_description)
+        results = [
+            {
+                "index": i,
+                "name": names[i],
+                "atsScore": round(scores[i]["score"] * 100, 2),
+                "sectionScores": {section: round(score * 100, 2) for section, score in scores[i]["sections"].items()},
+                "empty": not entries[i]["text"],
+            }
+            for i in range(len(names))
+        ]
+        results.sort(key=lambda r: r["atsScore"], reverse=True)
+        return {"results": results}
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.post("/api/candidates/search")
+async def candidates_search(request: Request):
+    try:
+        data = await request.json()
+        job_description = data.get("jobDescription")
+        top_k = int(data.get("topK", 10))
+        if not job_description:
+            return JSONResponse(status_code=400, content={"error": "Missing jobDescription"})
+        # The index preselects by whole-document cosine; candidates are then ranked by ATS score
+        jd_embedding = await run_in_stage("embed", encode_text, job_description)
+        matches = await run_in_stage("embed", embedding_index.search, jd_embedding, top_k=top_k * CANDIDATE_RERANK_FACTOR)
+        return {"results": await run_in_stage("embed", rescore_candidates, matches, job_description, top_k)}
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.delete("/api/candidates/{resume_id}")
+async def candidates_delete(resume_id: str):
+    if not await run_in_stage("io", embedding_index.delete, resume_id):
+        return JSONResponse(status_code=404, content={"error": "Unknown resume id"})
+    return {"deleted": resume_id}
+
+@app.post("/api/candidates/compact")
+async def candidates_compact():
+    return await run_in_stage("io", embedding_index.compact)
+
+@app.get("/api/candidates/stats")
+async def candidates_stats():
+    return await run_in_stage("io", embedding_index.stats)
+
+def job_documents(uploads):
+    """(filename, bytes) of uploaded PDFs, expanding zip archives and skipping files over the size cap."""
+    for upload in uploads:
+        name = upload.filename or ""
+        if name.lower().endswith(".zip"):
+            yield from iter_zip_pdfs(upload.file)
+        elif name.lower().endswith(".pdf"):
+            # Same per-file cap as zip entries and directory imports; never read past it
+            data = upload.file.read(JOB_MAX_FILE_BYTES + 1)
+            if len(data) > JOB_MAX_FILE_BYTES:
+                print(f"Skipping {name}: larger than {JOB_MAX_FILE_BYTES} bytes")
+                continue
+            yield name, data
+
+@app.post("/api/jobs")
+async def jobs_submit(
+    job_description: str = Form(...),
+    resumes: Optional[List[UploadFile]] = File(None),
+    directory: Optional[str] = Form(None),
+):
+    """Queue PDFs (uploaded files, zip archives and/or a server-side directory) for bulk processing."""
+    try:
+        directory_path = None
+        if directory:
+            directory_path = resolve_import_directory(directory)
+            if directory_path is None:
+                return JSONResponse(status_code=400, content={"error": "directory must be an existing folder under JOBS_IMPORT_ROOT"})
+        documents = itertools.chain(
+            job_documents(resumes or []),
+            iter_directory_pdfs(directory_path) if directory_path else [],
+        )
+        job_id, count = await run_in_stage("io", submit_job, job_description, documents)
+        if job_id is None:
+            return JSONResponse(status_code=400, content={"error": "No PDF files found"})
+        return {"jobId": job_id, "files": count}
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.get("/api/jobs/{job_id}")
+async def jobs_progress(job_id: str):
+    progress = await run_in_stage("io", get_job_store().progress, job_id)
+    if progress is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job id"})
+    return progress
+
+@app.get("/api/jobs/{job_id}/results")
+async def jobs_results(job_id: str, format: str = "json"):
+    """Per-file results, best ATS score first, as JSON or a CSV download."""
+    store = get_job_store()
+    progress = await run_in_stage("io", store.progress, job_id)
+    if progress is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job id"})
+    results = await run_in_stage("io", store.results, job_id)
+    if format != "csv":
+        return {"job": progress, "results": results}
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["filename", "status", "atsScore", "name", "emails", "skills", "error"])
+    for r in results:
+        writer.writerow([
+            r["filename"], r["status"], r.get("atsScore"), r.get("name"),
+            "; ".join(r.get("emails") or []), "; ".join(r.get("skills") or []), r.get("error"),
+        ])
+    return Response(
+        content=output.getvalue(),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="job-{job_id}.csv"'},
+    )
+
+@app.delete("/api/jobs/{job_id}")
+async def jobs_cancel(job_id: str):
+    if not await run_in_stage("io", cancel_job, job_id):
+        return JSONResponse(status_code=404, content={"error": "Unknown job id"})
+    return {"cancelled": job_id}
+
+@app.get("/api/jobs-stats")
+async def jobs_stats():
+    return await run_in_stage("io", get_job_store().stats)
+
+@app.get("/api/llm/stats")
+async def llm_stats_endpoint():
+    return await run_in_stage("io", llm_stats)
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return resume_cache.stats()
+
+@app.get("/api/embeddings/stats")
+async def embeddings_stats():
+    return embedding_service.stats()
+
+@app.get("/api/stages/stats")
+async def stages_stats():
+    return stage_stats()
+
+def sse_event(data, event=None):
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def sse_response(tokens, finalize=lambda text: text.strip()):
+    """
+    Stream LLM tokens as text/event-stream: one {"token"} event per chunk,
+    then a "done" event with the full post-processed text, or an "error" event.
+    finalize may be a coroutine function.
+    """
+    async def events():
+        parts = []
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield sse_event({"token": token})
+            text = finalize("".join(parts))
+            if inspect.isawaitable(text):
+                text = await text
+            yield sse_event({"text": text}, event="done")
+        except Exception as e:
+            print(traceback.format_exc())
+            yield sse_event({"error": str(e)}, event="error")
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.post("/api/interview/start")
 async def interview_start(request: Request):
@@ -42,8 +341,10 @@ async def interview_start(request: Request):
         resume_text = data.get("resumeText")
         if not resume_text:
             return JSONResponse(status_code=400, content={"error": "Missing resumeText"})
-        questions = generate_interview_questions(resume_text)
+        questions = await generate_interview_questions(resume_text)
         return {"questions": questions}
+    except (StageOverloaded, LLMError):
+        raise
     except Exception as e:
         print(traceback.format_exc())
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -57,8 +358,42 @@ async def interview_evaluate(request: Request):
         resume_text = data.get("resumeText")
         if not question or not answer or not resume_text:
             return JSONResponse(status_code=400, content={"error": "Missing question, answer, or resumeText"})
-        result = evaluate_single_answer(question, answer, resume_text)
+        result = await evaluate_single_answer(question, answer, resume_text)
         return result
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+def parse_qa_pairs(items):
+    """Validated [{"question", "answer"}] list, or None if any item is malformed."""
+    if not isinstance(items, list) or not items:
+        return None
+    pairs = []
+    for item in items:
+        if not isinstance(item, dict) or not item.get("question") or not item.get("answer"):
+            return None
+        pairs.append({"question": item["question"], "answer": item["answer"]})
+    return pairs
+
+@app.post("/api/interview/evaluate-batch")
+async def interview_evaluate_batch(request: Request):
+    """Evaluate every Q&A pair and generate the final report in one call."""
+    try:
+        data = await request.json()
+        qa_pairs = parse_qa_pairs(data.get("qa"))
+        resume_text = data.get("resumeText")
+        mode = data.get("mode", "concurrent")
+        if not qa_pairs or not resume_text:
+            return JSONResponse(status_code=400, content={"error": "Missing qa (list of question/answer pairs) or resumeText"})
+        if mode not in EVALUATION_MODES:
+            return JSONResponse(status_code=400, content={"error": f"mode must be one of: {', '.join(EVALUATION_MODES)}"})
+        return await evaluate_interview(
+            qa_pairs, resume_text, mode, data.get("userName"), include_report=data.get("includeReport", True)
+        )
+    except (StageOverloaded, LLMError):
+        raise
     except Exception as e:
         print(traceback.format_exc())
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -74,13 +409,27 @@ async def interview_report(request: Request):
             return JSONResponse(status_code=400, content={"error": "Missing interviewData"})
         # If user_name is not provided, try to extract from resume_text
         if not user_name and resume_text:
-            user_name = extract_name_from_resume(resume_text)
-        report = generate_final_report(interview_data, user_name)
+            user_name = await run_in_stage("nlp", extract_name_from_resume, resume_text)
+        report = await generate_final_report(interview_data, user_name)
         return {"report": report}
+    except (StageOverloaded, LLMError):
+        raise
     except Exception as e:
         print(traceback.format_exc())
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.post("/api/interview/report/stream")
+async def interview_report_stream(request: Request):
+    data = await request.json()
+    interview_data = data.get("interviewData")
+    user_name = data.get("userName")
+    resume_text = data.get("resumeText")
+    if not interview_data:
+        return JSONResponse(status_code=400, content={"error": "Missing interviewData"})
+    if not user_name and resume_text:
+        user_name = await run_in_stage("nlp", extract_name_from_resume, resume_text)
+    return sse_response(stream_final_report(interview_data, user_name))
+
 @app.post("/api/interview/next-question")
 async def interview_next_question(request: Request):
     try:
@@ -90,69 +439,413 @@ async def interview_next_question(request: Request):
         user_intro = data.get("userIntro")
         if not resume_text or chat_history is None:
             return JSONResponse(status_code=400, content={"error": "Missing resumeText or chatHistory"})
-        question = next_interview_question(resume_text, chat_history, user_intro)
+        question = await next_interview_question(resume_text, chat_history, user_intro)
         return {"question": question}
+    except (StageOverloaded, LLMError):
+        raise
     except Exception as e:
         print(traceback.format_exc())
         if "quota" in str(e).lower() or "ResourceExhausted" in str(e):
             return JSONResponse(status_code=429, content={"error": "Gemini API quota exceeded. Please try again later or upgrade your plan."})
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.post("/api/interview/next-question/stream")
+async def interview_next_question_stream(request: Request):
+    data = await request.json()
+    resume_text = data.get("resumeText")
+    chat_history = data.get("chatHistory")
+    user_intro = data.get("userIntro")
+    if not resume_text or chat_history is None:
+        return JSONResponse(status_code=400, content={"error": "Missing resumeText or chatHistory"})
+    return sse_response(stream_next_interview_question(resume_text, chat_history, user_intro), finalize=clean_question)
+
+def session_not_found():
+    return JSONResponse(status_code=404, content={"error": "Unknown or expired sessionId"})
+
+def session_chat_history(session):
+    return [{"question": qa["question"], "answer": qa["answer"]} for qa in session["history"]]
+
+def record_answer(session, answer):
+    """Pair the candidate's newest answer with the question currently being asked."""
+    if answer and session["currentQuestion"]:
+        session["history"].append({"question": session["currentQuestion"], "answer": answer})
+        session["currentQuestion"] = None
+
+@app.post("/api/interview/sessions")
+async def interview_session_create(request: Request):
+    try:
+        data = await request.json()
+        resume_text = data.get("resumeText")
+        if not resume_text:
+            return JSONResponse(status_code=400, content={"error": "Missing resumeText"})
+        user_name = data.get("userName") or await run_in_stage("nlp", extract_name_from_resume, resume_text)
+        session_id, _ = await run_in_stage("io", session_store.create, resume_text, data.get("userIntro"), artifacts={"userName": user_name})
+        return {"sessionId": session_id}
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.get("/api/interview/sessions/{session_id}")
+async def interview_session_get(session_id: str):
+    session = await run_in_stage("io", session_store.get, session_id)
+    if session is None:
+        return session_not_found()
+    return {
+        "sessionId": session_id,
+        "currentQuestion": session["currentQuestion"],
+        "history": session["history"],
+        "artifacts": session["artifacts"],
+    }
+
+@app.delete("/api/interview/sessions/{session_id}")
+async def interview_session_delete(session_id: str):
+    if not await run_in_stage("io", session_store.delete, session_id):
+        return session_not_found()
+    return {"deleted": session_id}
+
+@app.post("/api/interview/sessions/{session_id}/next-question")
+async def interview_session_next_question(session_id: str, request: Request):
+    """Record the newest answer (if any) and ask the next question."""
+    try:
+        data = await request.json()
+        session = await run_in_stage("io", session_store.get, session_id)
+        if session is None:
+            return session_not_found()
+        session["userIntro"] = data.get("userIntro") or session["userIntro"]
+        record_answer(session, data.get("answer"))
+        history = session_chat_history(session)
+        question = await next_interview_question(session["resumeText"], history, session["userIntro"])
+        session["currentQuestion"] = question
+        await run_in_stage("io", session_store.save, session_id, session)
+        return {"question": question, "questionNumber": len(history) + 1}
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.post("/api/interview/sessions/{session_id}/next-question/stream")
+async def interview_session_next_question_stream(session_id: str, request: Request):
+    data = await request.json()
+    session = await run_in_stage("io", session_store.get, session_id)
+    if session is None:
+        return session_not_found()
+    session["userIntro"] = data.get("userIntro") or session["userIntro"]
+    record_answer(session, data.get("answer"))
+    await run_in_stage("io", session_store.save, session_id, session)
+
+    async def finalize(text):
+        question = clean_question(text)
+        session["currentQuestion"] = question
+        await run_in_stage("io", session_store.save, session_id, session)
+        return question
+
+    tokens = stream_next_interview_question(session["resumeText"], session_chat_history(session), session["userIntro"])
+    return sse_response(tokens, finalize=finalize)
+
+@app.post("/api/interview/sessions/{session_id}/evaluate")
+async def interview_session_evaluate(session_id: str, request: Request):
+    """Evaluate one answered question (the latest unless "index" is given) and store the result."""
+    try:
+        data = await request.json()
+        session = await run_in_stage("io", session_store.get, session_id)
+        if session is None:
+            return session_not_found()
+        if not session["history"]:
+            return JSONResponse(status_code=400, content={"error": "No answered questions to evaluate"})
+        index = data.get("index", len(session["history"]) - 1)
+        if not isinstance(index, int) or not 0 <= index < len(session["history"]):
+            return JSONResponse(status_code=400, content={"error": "Invalid index"})
+        qa = session["history"][index]
+        result = await evaluate_single_answer(qa["question"], qa["answer"], session["resumeText"])
+        qa["evaluation"] = result
+        await run_in_stage("io", session_store.save, session_id, session)
+        return result
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+def session_interview_data(session):
+    return [
+        {"question": qa["question"], "answer": qa["answer"], "feedback": (qa.get("evaluation") or {}).get("feedback")}
+        for qa in session["history"]
+    ]
+
+@app.post("/api/interview/sessions/{session_id}/report")
+async def interview_session_report(session_id: str):
+    try:
+        session = await run_in_stage("io", session_store.get, session_id)
+        if session is None:
+            return session_not_found()
+        if not session["history"]:
+            return JSONResponse(status_code=400, content={"error": "No answered questions to report on"})
+        report = await generate_final_report(session_interview_data(session), session["artifacts"].get("userName"))
+        return {"report": report}
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.post("/api/interview/sessions/{session_id}/report/stream")
+async def interview_session_report_stream(session_id: str):
+    session = await run_in_stage("io", session_store.get, session_id)
+    if session is None:
+        return session_not_found()
+    if not session["history"]:
+        return JSONResponse(status_code=400, content={"error": "No answered questions to report on"})
+    return sse_response(stream_final_report(session_interview_data(session), session["artifacts"].get("userName")))
+
+@app.post("/api/interview/sessions/{session_id}/evaluate-batch")
+async def interview_session_evaluate_batch(session_id: str, request: Request):
+    """Evaluate every answered question, store the results and return them with the final report."""
+    try:
+        data = await request.json()
+        session = await run_in_stage("io", session_store.get, session_id)
+        if session is None:
+            return session_not_found()
+        if not session["history"]:
+            return JSONResponse(status_code=400, content={"error": "No answered questions to evaluate"})
+        mode = data.get("mode", "concurrent")
+        if mode not in EVALUATION_MODES:
+            return JSONResponse(status_code=400, content={"error": f"mode must be one of: {', '.join(EVALUATION_MODES)}"})
+        result = await evaluate_interview(
+            session_chat_history(session), session["resumeText"], mode,
+            session["artifacts"].get("userName"), include_report=data.get("includeReport", True),
+        )
+        for qa, evaluation in zip(session["history"], result["evaluations"]):
+            qa["evaluation"] = evaluation
+        await run_in_stage("io", session_store.save, session_id, session)
+        return result
+    except (StageOverloaded, LLMError):
+        raise
+    except Exception as e:
+        print(traceback.format_exc())
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.websocket("/api/interview/sessions/{session_id}/ws")
+async def interview_session_ws(websocket: WebSocket, session_id: str):
+    """
+    Full-duplex interview turns for a session.
+
+    Client -> server: binary audio frames (16 kHz mono 16-bit PCM by default;
+    send {"type": "start", "format": "webm"} first to send a container
+    recording instead), {"type": "end"} to end an answer early, or
+    {"type": "answer", "text"} for a typed answer.
+
+    Server -> client: {"type": "transcript", "text", "final"} as phrases are
+    transcribed, then {"type": "token", "text"} while the next question is
+    generated and {"type": "question", "question", "questionNumber"} when it
+    is complete; {"type": "error", "error"} on failures.
+
+    PCM answers end automatically on a long enough pause. Phrases are
+    transcribed while the candidate is still speaking, so the next question
+    starts right after the last phrase is transcribed.
+    """
+    await websocket.accept()
+    session = await run_in_stage("io", session_store.get, session_id)
+    if session is None:
+        await websocket.send_json({"type": "error", "error": "Unknown or expired sessionId"})
+        await websocket.close(code=4404)
+        return
+
+    segmenter = SpeechSegmenter()
+    audio_format = "pcm"
+    recording = bytearray()
+    pieces = []
+
+    async def transcribe_phrase(pcm):
+        text = await run_in_stage("speech", transcribe_pcm, pcm)
+        if text:
+            await websocket.send_json({"type": "transcript", "text": text, "final": False})
+        return text
+
+    async def ask_next_question(answer):
+        record_answer(session, answer)
+        await run_in_stage("io", session_store.save, session_id, session)
+        history = session_chat_history(session)
+        parts = []
+        async for token in stream_next_interview_question(session["resumeText"], history, session["userIntro"]):
+            parts.append(token)
+            await websocket.send_json({"type": "token", "text": token})
+        question = clean_question("".join(parts))
+        session["currentQuestion"] = question
+        await run_in_stage("io", session_store.save, session_id, session)
+        await websocket.send_json({"type": "question", "question": question, "questionNumber": len(history) + 1})
+
+    async def finish_answer(tail_pcm):
+        if tail_pcm:
+            pieces.append(asyncio.ensure_future(transcribe_phrase(tail_pcm)))
+        texts = await asyncio.gather(*pieces)
+        pieces.clear()
+        answer = " ".join(text for text in texts if text)
+        await websocket.send_json({"type": "transcript", "text": answer, "final": True})
+        if not answer:
+            await websocket.send_json({"type": "error", "error": "Speech could not be understood. Please try speaking more clearly."})
+            return
+        await ask_next_question(answer)
+
+    async def finish_recording(upload):
+        pcm = await run_in_stage("speech", decode_audio, upload, audio_format)
+        if pcm is None:
+            raise ValueError(f"Unsupported audio format: {audio_format}")
+        await finish_answer(pcm)
+
+    async def run_turn(turn):
+        try:
+            await turn
+        except WebSocketDisconnect:
+            raise
+        except Exception as e:
+            print(traceback.format_exc())
+            for task in pieces:
+                task.cancel()
+            pieces.clear()
+            await websocket.send_json({"type": "error", "error": str(e)})
+
+    try:
+        if not session["currentQuestion"]:
+            await run_turn(ask_next_question(None))
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                if audio_format != "pcm":
+                    if len(recording) + len(message["bytes"]) > AUDIO_MAX_BYTES:
+                        recording.clear()
+                        await websocket.send_json({"type": "error", "error": "Recording is too large"})
+                    else:
+                        recording.extend(message["bytes"])
+                    continue
+                for kind, pcm in segmenter.feed(message["bytes"]):
+                    if kind == "phrase":
+                        pieces.append(asyncio.ensure_future(transcribe_phrase(pcm)))
+                    else:
+                        await run_turn(finish_answer(pcm))
+                continue
+            try:
+                data = json.loads(message.get("text") or "{}")
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                await websocket.send_json({"type": "error", "error": "Messages must be JSON objects"})
+                continue
+            if data.get("type") == "start":
+                audio_format = data.get("format", "pcm")
+                segmenter.reset()
+                recording.clear()
+            elif data.get("type") == "end":
+                if audio_format == "pcm":
+                    await run_turn(finish_answer(segmenter.flush()))
+                else:
+                    upload, recording = bytes(recording), bytearray()
+                    await run_turn(finish_recording(upload))
+            elif data.get("type") == "answer" and data.get("text"):
+                await run_turn(ask_next_question(data["text"]))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in pieces:
+            task.cancel()
+
+@app.get("/api/interview/sessions-stats")
+async def interview_sessions_stats():
+    return await run_in_stage("io", session_store.stats)
+
 @app.post("/api/career-coach")
 async def career_coach(request: Request):
     data = await request.json()
     resume_text = data.get("resumeText")
     job_description = data.get("jobDescription")
     user_message = data.get("userMessage")
-    response = career_assistant({
+    response = await career_assistant({
         "resumeText": resume_text,
         "jobDescription": job_description,
         "message": user_message
     })
     return response
 
+@app.post("/api/career-coach/stream")
+async def career_coach_stream(request: Request):
+    data = await request.json()
+    tokens = stream_career_assistant({
+        "resumeText": data.get("resumeText"),
+        "jobDescription": data.get("jobDescription"),
+        "message": data.get("userMessage")
+    })
+    return sse_response(tokens, finalize=lambda text: text.strip() or FALLBACK_RESPONSE)
+
 @app.post("/api/generate-questions")
 async def generate_questions_endpoint(resume_info: dict):
-    result = generate_questions(resume_info)
+    result = await generate_questions(resume_info)
     return JSONResponse(content=result)
 
 @app.post("/api/evaluate-answer")
 async def evaluate_answer_endpoint(payload: dict):
-    result = evaluate_answer(payload)
+    result = await evaluate_answer(payload)
     return JSONResponse(content=result)
 
 @app.post("/api/generate-report")
 async def generate_report_endpoint(payload: dict):
-    pdf_bytes = generate_report(payload)
+    pdf_bytes = await run_in_stage("io", generate_report, payload)
     return StreamingResponse(io.BytesIO(pdf_bytes), media_type="application/pdf", headers={"Content-Disposition": "attachment; filename=CareerMate-Report.pdf"})
 
 @app.post("/api/extract-name")
 async def extract_name_endpoint(request: Request):
     data = await request.json()
     resume_text = data.get("resumeText", "")
-    name = extract_name_from_resume(resume_text) or ""
+    name = await run_in_stage("nlp", extract_name_from_resume, resume_text) or ""
     return {"name": name}
 
+@app.post("/api/parse-resume")
+async def parse_resume_endpoint(request: Request):
+    data = await request.json()
+    resume_text = data.get("resumeText")
+    if not resume_text:
+        return JSONResponse(status_code=400, content={"error": "Missing resumeText"})
+    digest = await run_in_stage("nlp", get_resume_digest, resume_text)
+    return {"digest": digest.to_dict(), "promptText": digest.to_prompt()}
+
 @app.get("/api/test")
 async def test_endpoint():
     """Test endpoint to verify the server is running"""
     return {"message": "Backend server is running!", "status": "ok"}
 
+@app.get("/api/ready")
+async def ready_endpoint():
+    """Report which models are loaded and warm"""
+    status = registry.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 @app.post("/api/speech-to-text")
 async def speech_to_text_endpoint(audio: UploadFile = File(...)):
     """
     Convert uploaded audio file to text using Google Speech Recognition
     """
     try:
-        # Read the uploaded audio file
-        audio_data = await audio.read()
+        # Read the uploaded audio file, refusing oversized uploads before decoding
+        audio_data = await audio.read(AUDIO_MAX_BYTES + 1)
+        if len(audio_data) > AUDIO_MAX_BYTES:
+            return JSONResponse(
+                status_code=413,
+                content={
+                    "success": False,
+                    "text": "",
+                    "error": f"Audio is larger than {AUDIO_MAX_BYTES // (1024 * 1024)} MB"
+                }
+            )
         
         # Get the file extension to determine format
         file_extension = audio.filename.split('.')[-1].lower() if audio.filename else 'webm'
         print(f"Received audio file: {audio.filename}, detected format: {file_extension}")
         
         # Convert audio to text
-        result = convert_audio_to_text(audio_data, file_extension)
+        result = await run_in_stage("speech", convert_audio_to_text, audio_data, file_extension)
         
         if result["success"]:
             return JSONResponse(content={
@@ -170,6 +863,8 @@ async def speech_to_text_endpoint(audio: UploadFile = File(...)):
                 }
             )
             
+    except (StageOverloaded, LLMError):
+        raise
     except Exception as e:
         print(traceback.format_exc())
         return JSONResponse(
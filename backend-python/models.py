@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+
+# "background": load after startup in a thread, "lazy": load on first use, "eager": load before serving
+MODEL_LOADING = os.getenv("MODEL_LOADING", "background").lower()
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"
+SBERT_MODEL_NAME = "all-MiniLM-L6-v2"
+# "torch" (sentence-transformers) or "onnx" (ONNX Runtime, see onnx_embedder.py)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+SPACY_MODEL_NAME = "en_core_web_sm"
+
+def _load_sbert():
+    if EMBEDDING_BACKEND == "onnx":
+        from onnx_embedder import OnnxEncoder
+        return OnnxEncoder()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(SBERT_MODEL_NAME)
+
+def _load_keybert():
+    from keybert import KeyBERT
+    # Share the SBERT instance instead of loading a second copy of MiniLM
+    model = get_sbert_model()
+    if EMBEDDING_BACKEND == "onnx":
+        from onnx_embedder import keybert_backend
+        model = keybert_backend(model)
+    return KeyBERT(model=model)
+
+def _load_nlp():
+    import spacy
+    return spacy.load(SPACY_MODEL_NAME)
+
+class ModelRegistry:
+    """
+    Loads models on first use (or in the background) and tracks their state.
+
+    Each model goes cold -> loading -> loaded -> warm, or to error if
+    loading fails. Models are loaded at most once per process. Readiness
+    only waits for the `required` models; the others (KeyBERT, used only
+    for novel keywords) may stay cold under lazy loading.
+    """
+
+    def __init__(self, loaders, warmups, required=None):
+        self._loaders = loaders
+        self._warmups = warmups
+        self._required = set(loaders if required is None else required)
+        self._models = {}
+        self._status = {name: "cold" for name in loaders}
+        self._errors = {}
+        self._load_seconds = {}
+        self._locks = {name: threading.Lock() for name in loaders}
+        self._background = None
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:
+            if name not in self._models:
+                self._status[name] = "loading"
+                start = time.perf_counter()
+                try:
+                    self._models[name] = self._loaders[name]()
+                except Exception as e:
+                    self._status[name] = "error"
+                    self._errors[name] = str(e)
+                    raise
+                self._load_seconds[name] = round(time.perf_counter() - start, 3)
+                self._status[name] = "loaded"
+                self._errors.pop(name, None)
+            return self._models[name]
+
+    def warmup(self, name):
+        """Run one dummy inference so the first real request doesn't pay for lazy init."""
+        model = self.get(name)
+        if self._status[name] != "warm":
+            self._warmups[name](model)
+            self._status[name] = "warm"
+        return model
+
+    def load_all(self, warmup=MODEL_WARMUP):
+        for name in self._loaders:
+            try:
+                self.warmup(name) if warmup else self.get(name)
+            except Exception as e:
+                print(f"Error loading model {name}: {str(e)}")
+
+    def start_background_load(self, warmup=MODEL_WARMUP):
+        if self._background is None:
+            self._background = threading.Thread(target=self.load_all, args=(warmup,), daemon=True, name="model-loader")
+            self._background.start()
+        return self._background
+
+    def status(self):
+        models = {
+            name: {
+                "status": self._status[name],
+                "loadSeconds": self._load_seconds.get(name),
+                "error": self._errors.get(name),
+                "required": name in self._required,
+            }
+            for name in self._loaders
+        }
+        ready = all(info["status"] in ("loaded", "warm") for info in models.values() if info["required"])
+        return {"ready": ready, "models": models}
+
+registry = ModelRegistry(
+    loaders={"sbert": _load_sbert, "nlp": _load_nlp, "keybert": _load_keybert},
+    warmups={
+        "sbert": lambda model: model.encode(["warm up"]),
+        "nlp": lambda model: model("Warm up the pipeline."),
+        "keybert": lambda model: model.extract_keywords("warm up keyword extraction", top_n=1),
+    },
+    # What the core routes need; KeyBERT only backs the optional novel-keyword lookup
+    required=("sbert", "nlp"),
+)
+
+def get_sbert_model():
+    return registry.get("sbert")
+
+def get_keybert_model():
+    return registry.get("keybert")
+
+def get_nlp():
+    return registry.get("nlp")
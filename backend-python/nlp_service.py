@@ -0,0 +1,123 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from models import get_nlp
+
+# Documents per nlp.pipe batch, and how long a request waits for others to batch with
+NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "32"))
+NLP_BATCH_WAIT = float(os.getenv("NLP_BATCH_WAIT", "0.005"))
+# Worker processes for large batches (bulk jobs); single requests always run in-process
+NLP_N_PROCESS = int(os.getenv("NLP_N_PROCESS", "1"))
+
+# Pipeline components each task needs; everything else is disabled. In
+# en_core_web_sm the ner component has its own tok2vec layer, so "ner"
+# skips the shared tok2vec, tagger and parser entirely.
+TASK_COMPONENTS = {
+    "ner": ("ner",),
+    "lemma": ("tok2vec", "tagger", "attribute_ruler", "lemmatizer"),
+}
+
+def disabled_components(nlp, task):
+    needed = set(TASK_COMPONENTS[task])
+    # Other pipelines may have their components listen to the shared tok2vec
+    if "tok2vec" in nlp.pipe_names and needed & set(getattr(nlp.get_pipe("tok2vec"), "listening_components", [])):
+        needed.add("tok2vec")
+    return [name for name in nlp.pipe_names if name not in needed]
+
+class NLPService:
+    """
+    Shared front end to the spaCy pipeline.
+
+    Each task runs only the components it needs. Single documents submitted
+    concurrently are collected for up to NLP_BATCH_WAIT seconds and processed
+    together with nlp.pipe; explicit batches go straight to nlp.pipe, using
+    NLP_N_PROCESS worker processes when the batch is large enough to pay for
+    them.
+    """
+
+    def __init__(self, batch_size=NLP_BATCH_SIZE, batch_wait=NLP_BATCH_WAIT, n_process=NLP_N_PROCESS):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.n_process = n_process
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+    def pipe(self, texts, task):
+        """Process a list of texts for one task, returning docs in order."""
+        nlp = get_nlp()
+        n_process = self.n_process if self.n_process > 1 and len(texts) >= self.batch_size * self.n_process else 1
+        return list(nlp.pipe(texts, disable=disabled_components(nlp, task), batch_size=self.batch_size, n_process=n_process))
+
+    def process(self, text, task):
+        """Process one text, batched with any other documents submitted at the same time."""
+        future = Future()
+        self._ensure_worker()
+        self._queue.put((task, text, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, daemon=True, name="nlp-batcher")
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            for task in dict.fromkeys(task for task, _, _ in batch):
+                items = [(text, future) for t, text, future in batch if t == task]
+                try:
+                    docs = self.pipe([text for text, _ in items], task)
+                except Exception as e:
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+                for (_, future), doc in zip(items, docs):
+                    future.set_result(doc)
+
+nlp_service = NLPService()
+
+def benchmark(texts, repeat=3):
+    """
+    Per-document seconds of the full pipeline (the old per-request nlp(text)
+    calls) versus the slimmed per-task service, over the given texts.
+    """
+    nlp = get_nlp()
+    timings = {}
+    runs = {
+        "full": lambda: [nlp(text) for text in texts],
+        "lemma": lambda: nlp_service.pipe(texts, "lemma"),
+        "ner": lambda: nlp_service.pipe(texts, "ner"),
+    }
+    for label, run in runs.items():
+        run()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        timings[label] = (time.perf_counter() - start) / (repeat * len(texts))
+    return {
+        "perDocSeconds": {label: round(seconds, 5) for label, seconds in timings.items()},
+        "speedup": {label: round(timings["full"] / timings[label], 2) for label in ("lemma", "ner")},
+    }
+
+if __name__ == "__main__":
+    # python nlp_service.py resume1.txt resume2.txt ...
+    import sys
+    import json
+    texts = [open(path, encoding="utf-8").read() for path in sys.argv[1:]]
+    if not texts:
+        sys.exit("usage: python nlp_service.py <text files>")
+    print(json.dumps(benchmark(texts), indent=2))
@@ -0,0 +1,219 @@
+import io
+import os
+import re
+import math
+import time
+import subprocess
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import pytesseract
+from PIL import Image
+
+# Number of worker processes used for OCR and per-document timeout in seconds
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "120"))
+# Pages are OCRed at OCR_DPI first and re-rasterized at OCR_RESCAN_DPI only when
+# the mean word confidence (0-100) of the first pass is below OCR_MIN_CONFIDENCE
+OCR_DPI = int(os.getenv("OCR_DPI", "150"))
+OCR_RESCAN_DPI = int(os.getenv("OCR_RESCAN_DPI", "300"))
+OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "75"))
+# LSTM engine with automatic page segmentation (resumes are often multi-column)
+OCR_TESSERACT_CONFIG = os.getenv("OCR_TESSERACT_CONFIG", "--oem 1 --psm 3")
+# At most this many pages of a document are rasterized
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "20"))
+# Pixel budget per page raster; larger pages are rendered at a proportionally lower DPI
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", "12000000"))
+# Stop OCRing further pages once this many characters have been collected (0 disables)
+OCR_TEXT_LIMIT = int(os.getenv("OCR_TEXT_LIMIT", "20000"))
+
+_PAGE_SIZE_RE = re.compile(r"^Page\s+(\d+)\s+size:\s+([\d.]+)\s+x\s+([\d.]+)", re.MULTILINE)
+_PAGES_RE = re.compile(r"^Pages:\s+(\d+)", re.MULTILINE)
+
+_executor = None
+
+def get_ocr_executor():
+    global _executor
+    if _executor is None:
+        # Spawn rather than fork: the web process has model-loading threads and torch state
+        _executor = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def pdf_page_info(pdf_bytes, max_pages=OCR_MAX_PAGES, timeout=OCR_TIMEOUT):
+    """Page count and {page_number: (width_pt, height_pt)} for the first max_pages pages, via pdfinfo on stdin."""
+    try:
+        result = subprocess.run(
+            ["pdfinfo", "-f", "1", "-l", str(max_pages), "-"],
+            input=pdf_bytes, capture_output=True, check=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise TimeoutError(f"Reading the page sizes took longer than {timeout:.0f} seconds")
+    output = result.stdout.decode("utf-8", errors="replace")
+    match = _PAGES_RE.search(output)
+    page_count = int(match.group(1)) if match else 0
+    sizes = {int(n): (float(w), float(h)) for n, w, h in _PAGE_SIZE_RE.findall(output)}
+    return page_count, sizes
+
+def page_dpi(size, dpi=OCR_DPI, max_pixels=OCR_MAX_PIXELS):
+    """The requested DPI, lowered for oversized pages so the raster stays within the pixel budget."""
+    if size is None:
+        return dpi
+    width, height = size
+    pixels = (width / 72 * dpi) * (height / 72 * dpi)
+    if pixels <= max_pixels:
+        return dpi
+    return max(36, int(dpi * math.sqrt(max_pixels / pixels)))
+
+def time_left(deadline):
+    """Seconds until a time.time() deadline (None if there is none); raises TimeoutError once it has passed."""
+    if deadline is None:
+        return None
+    left = deadline - time.time()
+    if left <= 0:
+        raise TimeoutError("OCR deadline passed")
+    return left
+
+def render_page(pdf_bytes, page_number, dpi=OCR_DPI, timeout=None):
+    """Rasterize a single page (1-based) straight to 8-bit grayscale, reading the PDF from stdin."""
+    try:
+        result = subprocess.run(
+            ["pdftoppm", "-f", str(page_number), "-l", str(page_number), "-r", str(dpi), "-gray", "-"],
+            input=pdf_bytes, capture_output=True, check=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise TimeoutError(f"Rasterizing page {page_number} took longer than {timeout:.0f} seconds")
+    return Image.open(io.BytesIO(result.stdout))
+
+def read_image(image, timeout=None):
+    """
+    Run Tesseract on an image, returning its text (lines and paragraphs
+    rebuilt from the word boxes) and the mean word confidence weighted by
+    word length.
+    """
+    try:
+        # pytesseract kills Tesseract after `timeout` seconds (0 disables it)
+        data = pytesseract.image_to_data(
+            image, config=OCR_TESSERACT_CONFIG, output_type=pytesseract.Output.DICT, timeout=timeout or 0,
+        )
+    except RuntimeError as e:
+        if timeout and "timeout" in str(e).lower():
+            raise TimeoutError(f"Tesseract took longer than {timeout:.0f} seconds") from e
+        raise
+    lines = {}
+    weighted = 0.0
+    chars = 0
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        confidence = float(data["conf"][i])
+        if confidence >= 0:
+            weighted += confidence * len(word)
+            chars += len(word)
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        lines.setdefault(key, []).append(word)
+    text_lines = []
+    paragraph = None
+    for (block, par, _), words in lines.items():
+        if paragraph is not None and paragraph != (block, par):
+            text_lines.append("")
+        paragraph = (block, par)
+        text_lines.append(" ".join(words))
+    return "\n".join(text_lines), (weighted / chars if chars else 0.0)
+
+def ocr_at(pdf_bytes, page_number, dpi, deadline=None):
+    image = render_page(pdf_bytes, page_number, dpi, timeout=time_left(deadline))
+    try:
+        text, confidence = read_image(image, timeout=time_left(deadline))
+    finally:
+        image.close()
+    return {"text": text, "confidence": round(confidence, 1), "dpi": dpi}
+
+def ocr_page(pdf_bytes, page_number, dpi=OCR_DPI, rescan_dpi=OCR_RESCAN_DPI, deadline=None):
+    """
+    OCR a single page at the fast DPI, re-rasterizing at rescan_dpi only when
+    the confidence is too low. Rasters are freed before returning. Raises
+    TimeoutError if the time.time() deadline passes, killing the running
+    pdftoppm or Tesseract process.
+
+    Returns:
+        dict: {"text": str, "confidence": float, "dpi": int}
+    """
+    result = ocr_at(pdf_bytes, page_number, dpi, deadline)
+    if result["confidence"] < OCR_MIN_CONFIDENCE and rescan_dpi > dpi:
+        rescan = ocr_at(pdf_bytes, page_number, rescan_dpi, deadline)
+        if rescan["confidence"] >= result["confidence"]:
+            result = rescan
+    return result
+
+def ocr_pages(pdf_bytes, page_numbers, timeout=None, text_limit=OCR_TEXT_LIMIT):
+    """
+    OCR the given pages of a PDF across the process pool, streaming: only a
+    small window of pages is in flight at a time, so memory stays flat
+    regardless of page count.
+
+    Returns ocr_page() results in the same order as page_numbers. The list is cut
+    short after OCR_MAX_PAGES pages, or once text_limit characters have been
+    collected. Raises TimeoutError if the document is not done within the
+    timeout.
+    """
+    timeout = OCR_TIMEOUT if timeout is None else timeout
+    page_numbers = list(page_numbers)
+    if len(page_numbers) > OCR_MAX_PAGES:
+        print(f"OCR limited to {OCR_MAX_PAGES} of {len(page_numbers)} pages")
+        page_numbers = page_numbers[:OCR_MAX_PAGES]
+    # Wall-clock deadline, so it also means something inside the worker processes
+    deadline = time.time() + timeout
+    try:
+        _, sizes = pdf_page_info(pdf_bytes, max(page_numbers, default=1), timeout=time_left(deadline))
+    except TimeoutError:
+        raise TimeoutError(f"OCR did not finish within {timeout} seconds")
+    jobs = deque((n, page_dpi(sizes.get(n)), page_dpi(sizes.get(n), OCR_RESCAN_DPI)) for n in page_numbers)
+
+    results = []
+    collected = 0
+    if len(jobs) <= 1 or OCR_WORKERS <= 1:
+        for job in jobs:
+            try:
+                results.append(ocr_page(pdf_bytes, *job, deadline=deadline))
+            except TimeoutError:
+                raise TimeoutError(f"OCR did not finish within {timeout} seconds")
+            collected += len(results[-1]["text"])
+            if text_limit and collected >= text_limit:
+                break
+        return results
+
+    executor = get_ocr_executor()
+    pending = deque()
+
+    def submit_next():
+        if jobs:
+            pending.append(executor.submit(ocr_page, pdf_bytes, *jobs.popleft(), deadline=deadline))
+
+    def cancel_pending():
+        for future in pending:
+            future.cancel()
+
+    # Two pages per worker keeps every worker busy while bounding queued work
+    for _ in range(OCR_WORKERS * 2):
+        submit_next()
+    while pending:
+        future = pending.popleft()
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.time()))
+        except (FutureTimeoutError, TimeoutError):
+            future.cancel()
+            cancel_pending()
+            raise TimeoutError(f"OCR did not finish within {timeout} seconds")
+        results.append(result)
+        collected += len(result["text"])
+        if text_limit and collected >= text_limit:
+            cancel_pending()
+            break
+        submit_next()
+    return results
+
+def ocr_pdf(pdf_bytes, timeout=None):
+    """OCR the pages of a PDF (up to OCR_MAX_PAGES), returning ocr_page() results in page order."""
+    page_count, _ = pdf_page_info(pdf_bytes, 1, timeout=OCR_TIMEOUT if timeout is None else timeout)
+    return ocr_pages(pdf_bytes, range(1, page_count + 1), timeout=timeout)
@@ -0,0 +1,201 @@
+import os
+import numpy as np
+
+# Exported MiniLM lives here; create it with `python onnx_embedder.py export`
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx/all-MiniLM-L6-v2")
+# Use the int8 dynamically quantized export (smaller and faster on CPU; check drift with `parity`)
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "true").lower() == "true"
+# Intra-op threads per inference; batches are encoded one at a time by the SBERT batcher
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", os.cpu_count() or 1))
+# Same truncation as the sentence-transformers config of all-MiniLM-L6-v2
+ONNX_MAX_SEQ_LENGTH = 256
+
+# Minimum per-text cosine to the PyTorch embeddings for `parity` to pass
+ONNX_PARITY_MIN_COSINE = {
+    "fp32": float(os.getenv("ONNX_PARITY_MIN_COSINE_FP32", "0.99")),
+    "int8": float(os.getenv("ONNX_PARITY_MIN_COSINE_INT8", "0.98")),
+}
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+class OnnxEncoder:
+    """
+    MiniLM sentence encoder on ONNX Runtime, without PyTorch.
+
+    Implements the subset of the SentenceTransformer interface the app uses
+    (encode and get_sentence_embedding_dimension): mean pooling over the
+    attention mask, then L2 normalization, as in all-MiniLM-L6-v2.
+    """
+
+    def __init__(self, model_dir=ONNX_MODEL_DIR, quantized=ONNX_QUANTIZED, threads=ONNX_THREADS):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=ONNX_MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        path = os.path.join(model_dir, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self):
+        return self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        # Longest first, like sentence-transformers, so each batch pads to similar lengths
+        order = sorted(range(len(texts)), key=lambda i: -len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            embeddings[indices] = self._encode_batch([texts[i] for i in indices])
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        hidden = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+        mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+def keybert_backend(encoder):
+    """Wrap an OnnxEncoder as a KeyBERT embedding backend."""
+    from keybert.backend import BaseEmbedder
+
+    class OnnxKeyBERTBackend(BaseEmbedder):
+        def embed(self, documents, verbose=False):
+            return encoder.encode(documents)
+
+    return OnnxKeyBERTBackend()
+
+def export(model_name, output_dir=ONNX_MODEL_DIR, quantize=True):
+    """
+    Export a sentence-transformers checkpoint to ONNX, plus an int8 dynamic
+    quantization of it. Build-time only: needs torch and transformers.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    tokenizer = AutoTokenizer.from_pretrained(f"sentence-transformers/{model_name}")
+    model = AutoModel.from_pretrained(f"sentence-transformers/{model_name}").eval()
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer.save_pretrained(output_dir)
+    sample = tokenizer(["Export MiniLM to ONNX."], return_tensors="pt")
+    path = os.path.join(output_dir, MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in INPUT_NAMES),
+            path,
+            input_names=INPUT_NAMES,
+            output_names=["last_hidden_state", "pooler_output"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in INPUT_NAMES},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+                "pooler_output": {0: "batch"},
+            },
+            opset_version=14,
+        )
+    if quantize:
+        quantize_dynamic(path, os.path.join(output_dir, QUANTIZED_MODEL_FILE), weight_type=QuantType.QInt8)
+    return output_dir
+
+def parity(texts, model_name):
+    """
+    Cosine agreement between the PyTorch SentenceTransformer and the ONNX
+    encoder (fp32 and int8), each checked against ONNX_PARITY_MIN_COSINE.
+    """
+    from sentence_transformers import SentenceTransformer
+    reference = SentenceTransformer(model_name).encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    result = {}
+    for label, quantized in (("fp32", False), ("int8", True)):
+        embeddings = OnnxEncoder(quantized=quantized).encode(texts)
+        cosines = np.sum(reference * embeddings, axis=1)
+        result[label] = {
+            "minCosine": round(float(cosines.min()), 4),
+            "meanCosine": round(float(cosines.mean()), 4),
+            "threshold": ONNX_PARITY_MIN_COSINE[label],
+            "passed": bool(cosines.min() >= ONNX_PARITY_MIN_COSINE[label]),
+        }
+    return result
+
+def measure(backend, texts, repeat=5):
+    """Load time, per-batch latency and peak RSS of one backend; run in a fresh process so RSS isn't shared."""
+    import time
+    import resource
+    start = time.perf_counter()
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        from models import SBERT_MODEL_NAME
+        model = SentenceTransformer(SBERT_MODEL_NAME)
+    else:
+        model = OnnxEncoder(quantized=backend == "onnx-int8")
+    load_seconds = time.perf_counter() - start
+    model.encode(texts[:2])
+    latencies = {}
+    for size in (1, 2, 32):
+        batch = (texts * size)[:size]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            model.encode(batch)
+        latencies[str(size)] = round(1000 * (time.perf_counter() - start) / repeat, 2)
+    return {
+        "loadSeconds": round(load_seconds, 2),
+        "latencyMsByBatchSize": latencies,
+        # ru_maxrss is in KiB on Linux
+        "peakRssMB": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def benchmark(paths):
+    """measure() for the torch, fp32 ONNX and int8 ONNX backends, each in its own process."""
+    import sys
+    import json
+    import subprocess
+    results = {}
+    for backend in ("torch", "onnx-fp32", "onnx-int8"):
+        output = subprocess.run(
+            [sys.executable, __file__, "measure", backend, *paths],
+            capture_output=True, check=True, text=True,
+        ).stdout
+        results[backend] = json.loads(output)
+    return results
+
+if __name__ == "__main__":
+    # python onnx_embedder.py export                  write ONNX_MODEL_DIR (needs torch + transformers)
+    # python onnx_embedder.py parity file1.txt ...    cosine agreement with the PyTorch model (exit 1 on failure)
+    # python onnx_embedder.py benchmark file1.txt ... latency and RSS of torch vs ONNX fp32/int8
+    import sys
+    import json
+    from models import SBERT_MODEL_NAME
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "export":
+        print(export(SBERT_MODEL_NAME))
+        sys.exit()
+    if command == "measure":
+        backend, paths = sys.argv[2], sys.argv[3:]
+    else:
+        paths = sys.argv[2:]
+    texts = [open(path, encoding="utf-8").read() for path in paths]
+    if command == "parity" and texts:
+        result = parity(texts, SBERT_MODEL_NAME)
+        print(json.dumps(result, indent=2))
+        if not all(check["passed"] for check in result.values()):
+            sys.exit(1)
+    elif command == "benchmark" and texts:
+        print(json.dumps(benchmark(paths), indent=2))
+    elif command == "measure" and texts:
+        print(json.dumps(measure(backend, texts)))
+    else:
+        sys.exit("usage: python onnx_embedder.py export | parity <text files> | benchmark <text files>")
@@ -1,28 +1,6 @@
 from reportlab.pdfgen import canvas
 import io
-import os
-from dotenv import load_dotenv
-import groq
-
-load_dotenv()
-API_KEY = os.getenv("GROQ_API_KEY")
-MODEL_NAME = "meta-llama/llama-4-scout-17b-16e-instruct"
-
-groq_client = groq.Groq(api_key=API_KEY)
-
-def groq_chat(prompt, system_prompt=None, max_tokens=1024, temperature=0.7):
-    messages = []
-    if system_prompt:
-        messages.append({"role": "system", "content": system_prompt})
-    messages.append({"role": "user", "content": prompt})
-    response = groq_client.chat.completions.create(
-        model=MODEL_NAME,
-        messages=messages,
-        max_tokens=max_tokens,
-        temperature=temperature
-    )
-    content = response.choices[0].message.content
-    return content if content is not None else ""
+from llm import groq_chat, MODEL_NAME
 
 def generate_report(payload):
     # If the frontend sent { reportData: {...} }, extract it
@@ -109,7 +87,7 @@ def generate_report(payload):
     buffer.seek(0)
     return buffer.read()
 
-def generate_evaluation_report(client=None, model=MODEL_NAME, interview_data=None):
+async def generate_evaluation_report(client=None, model=MODEL_NAME, interview_data=None):
     if not interview_data:
         return "No interview data provided."
 
@@ -137,5 +115,5 @@ def generate_evaluation_report(client=None, model=MODEL_NAME, interview_data=Non
         prompt += f"Difficulty: {item['question_data'].get('difficulty', 'N/A')}\n"
         prompt += f"Topic: {item['question_data'].get('main_subject', 'N/A')}"
 
-    text = groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.", max_tokens=1024)
+    text = await groq_chat(prompt, system_prompt="You are a helpful AI interview evaluator.", max_tokens=1024)
     return text
@@ -0,0 +1,278 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional
+from models import get_nlp
+from nlp_service import nlp_service
+from scheduler import run_in_stage
+from skills import SKILLS, ALIASES, CASE_SENSITIVE_SKILLS, canonical_skill
+
+DIGEST_CACHE_SIZE = int(os.getenv("DIGEST_CACHE_SIZE", "256"))
+# Fall back to (truncated) raw text when the digest is too sparse to stand in for the resume
+RESUME_PROMPT_CHARS = int(os.getenv("RESUME_PROMPT_CHARS", "4000"))
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"\+?\(?\d[\d \t().-]{8,}\d")
+URL_RE = re.compile(r"(?:https?://)?(?:www\.)?(?:linkedin\.com|github\.com|gitlab\.com|[\w-]+\.(?:dev|io|me))/?[\w/.-]*", re.IGNORECASE)
+DATE_RANGE_RE = re.compile(
+    r"((?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s*)?(?:19|20)\d{2}\s*(?:-|–|—|to)\s*"
+    r"((?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s*)?(?:(?:19|20)\d{2}|present|current|now|ongoing)",
+    re.IGNORECASE,
+)
+DEGREE_RE = re.compile(
+    r"\b(?:b\.?\s?tech|m\.?\s?tech|b\.?\s?e|m\.?\s?e|b\.?\s?sc|m\.?\s?sc|b\.?\s?com|m\.?\s?com|bca|mca|mba|"
+    r"b\.?\s?s|m\.?\s?s|b\.?\s?a|m\.?\s?a|ph\.?\s?d|bachelor|master|doctor|diploma|hsc|ssc|higher secondary|secondary school)\b",
+    re.IGNORECASE,
+)
+BULLET_RE = re.compile(r"^\s*(?:[-•●▪◦*·‣]|\d+[.)])\s*")
+# Separators between skills-section items; "/" only with spaces around it, so CI/CD and UI/UX stay whole
+SKILL_SEPARATOR_RE = re.compile(r"[,|•;]|\s+/\s+")
+
+SECTION_HEADINGS = {
+    "summary": ["summary", "professional summary", "profile", "objective", "career objective", "about me"],
+    "experience": ["experience", "work experience", "professional experience", "employment", "employment history",
+                   "work history", "internships", "internship", "internship experience"],
+    "education": ["education", "academic background", "academics", "educational qualifications", "qualifications"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "technologies", "tech stack", "skill set"],
+    "projects": ["projects", "personal projects", "academic projects", "key projects"],
+    "certifications": ["certifications", "certificates", "courses", "licenses and certifications"],
+    "achievements": ["achievements", "awards", "honors", "honours", "accomplishments"],
+    "publications": ["publications", "research"],
+    "activities": ["activities", "extracurricular activities", "positions of responsibility", "leadership", "volunteering"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies"],
+}
+_HEADING_TO_SECTION = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+HEADING_RE = re.compile(
+    r"^\s*(" + "|".join(sorted((re.escape(h) for h in _HEADING_TO_SECTION), key=len, reverse=True)) + r")\s*:?\s*$",
+    re.IGNORECASE,
+)
+
+@dataclass
+class Contacts:
+    emails: List[str] = field(default_factory=list)
+    phones: List[str] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+
+@dataclass
+class Entry:
+    """One experience or project item: its heading line, date range and bullet points."""
+    title: str
+    dates: Optional[str] = None
+    details: List[str] = field(default_factory=list)
+
+@dataclass
+class ResumeDigest:
+    name: Optional[str] = None
+    contacts: Contacts = field(default_factory=Contacts)
+    summary: str = ""
+    skills: List[str] = field(default_factory=list)
+    education: List[str] = field(default_factory=list)
+    experience: List[Entry] = field(default_factory=list)
+    projects: List[Entry] = field(default_factory=list)
+    sections: Dict[str, List[str]] = field(default_factory=dict)
+
+    def to_dict(self):
+        return asdict(self)
+
+    def is_sparse(self):
+        return not (self.experience or self.projects or self.education) and len(self.skills) < 3
+
+    def to_prompt(self, max_entries=6, max_details=3, max_detail_chars=160):
+        """Compact plain-text rendering used in LLM prompts instead of the raw resume."""
+        lines = []
+        if self.name:
+            lines.append(f"Name: {self.name}")
+        if self.summary:
+            lines.append(f"Summary: {self.summary[:400]}")
+        if self.skills:
+            lines.append(f"Skills: {', '.join(self.skills[:40])}")
+        for label, entries in (("Experience", self.experience), ("Projects", self.projects)):
+            if entries:
+                lines.append(f"{label}:")
+                for entry in entries[:max_entries]:
+                    heading = f"- {entry.title}" + (f" ({entry.dates})" if entry.dates else "")
+                    details = "; ".join(d[:max_detail_chars] for d in entry.details[:max_details])
+                    lines.append(heading + (f": {details}" if details else ""))
+        if self.education:
+            lines.append("Education: " + " | ".join(self.education[:4]))
+        for section in ("certifications", "achievements"):
+            if self.sections.get(section):
+                lines.append(f"{section.capitalize()}: " + " | ".join(self.sections[section][:5]))
+        return "\n".join(lines)
+
+_matchers = None
+_matchers_lock = threading.Lock()
+
+def get_skill_matchers():
+    """Case-insensitive and case-sensitive PhraseMatchers over the skill vocabulary, compiled once."""
+    global _matchers
+    if _matchers is None:
+        with _matchers_lock:
+            if _matchers is None:
+                from spacy.matcher import PhraseMatcher
+                nlp = get_nlp()
+                lower_matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+                exact_matcher = PhraseMatcher(nlp.vocab, attr="ORTH")
+                terms = list(SKILLS) + list(ALIASES)
+                lower_matcher.add("SKILL", [nlp.make_doc(t) for t in terms if t not in CASE_SENSITIVE_SKILLS])
+                exact_matcher.add("SKILL", [nlp.make_doc(t) for t in CASE_SENSITIVE_SKILLS])
+                _matchers = (lower_matcher, exact_matcher)
+    return _matchers
+
+def match_skills(doc):
+    """Canonical skill names found in a spaCy doc, in order of first appearance."""
+    found = []
+    seen = set()
+    for matcher in get_skill_matchers():
+        for _, start, end in matcher(doc):
+            skill = canonical_skill(doc[start:end].text)
+            if skill not in seen:
+                seen.add(skill)
+                found.append((start, skill))
+    return [skill for _, skill in sorted(found)]
+
+def split_sections(lines):
+    """Group lines under the section heading above them; lines before any heading go to "header"."""
+    sections = OrderedDict(header=[])
+    current = "header"
+    for line in lines:
+        match = HEADING_RE.match(line)
+        if match:
+            current = _HEADING_TO_SECTION[match.group(1).lower()]
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return sections
+
+def parse_entries(lines):
+    """Split a section into entries: heading lines (with dates) start an entry, bullets are its details."""
+    entries = []
+    for line in lines:
+        is_bullet = bool(BULLET_RE.match(line))
+        text = BULLET_RE.sub("", line).strip()
+        if not text:
+            continue
+        last = entries[-1] if entries else None
+        # Long lines are descriptions even when OCR dropped the bullet glyph
+        if last is not None and (is_bullet or len(text) > 80):
+            last.details.append(text)
+            continue
+        date = DATE_RANGE_RE.search(text)
+        title = (text[:date.start()] + text[date.end():]).strip(" ,|-–—") if date else text
+        if last is not None and not last.details and (date is None or last.dates is None):
+            # Second heading line, e.g. the company under the role or the dates on their own line
+            if date:
+                last.dates = date.group(0)
+            if title:
+                last.title = f"{last.title}, {title}"
+            continue
+        entries.append(Entry(title=title or text, dates=date.group(0) if date else None))
+    return entries
+
+def find_name(doc, header_lines):
+    header_text = "\n".join(header_lines[:5])
+    for ent in doc.ents:
+        if ent.label_ == "PERSON" and ent.start_char < max(len(header_text), 200):
+            return ent.text.strip()
+    # OCR output often has the name alone on the first line
+    for line in header_lines[:3]:
+        words = line.split()
+        if 2 <= len(words) <= 4 and all(w[:1].isupper() and w.replace(".", "").isalpha() for w in words):
+            return line.strip()
+    for ent in doc.ents:
+        if ent.label_ == "PERSON":
+            return ent.text.strip()
+    return None
+
+def parse_resume(text):
+    """
+    Parse resume text into a ResumeDigest with a single spaCy pass (NER plus
+    skill phrase matching) and compiled regexes for contacts, sections and dates.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    sections = split_sections(lines)
+    doc = nlp_service.process(text, "ner")
+
+    digest = ResumeDigest()
+    digest.contacts = Contacts(
+        emails=list(dict.fromkeys(EMAIL_RE.findall(text))),
+        phones=list(dict.fromkeys(p.strip() for p in PHONE_RE.findall(text) if 10 <= sum(c.isdigit() for c in p) <= 15)),
+        links=list(dict.fromkeys(URL_RE.findall(text))),
+    )
+    digest.name = find_name(doc, sections["header"])
+    digest.summary = " ".join(sections.get("summary", []))
+
+    skills = match_skills(doc)
+    # Skills section items that aren't in the vocabulary still count
+    for line in sections.get("skills", []):
+        line = line.split(":", 1)[-1]
+        for item in SKILL_SEPARATOR_RE.split(BULLET_RE.sub("", line)):
+            item = item.strip(" .")
+            if item and len(item) <= 30 and canonical_skill(item) not in skills:
+                skills.append(canonical_skill(item))
+    digest.skills = skills
+
+    education = sections.get("education", [])
+    if not education:
+        education = [line for line in lines if DEGREE_RE.search(line)]
+    digest.education = [BULLET_RE.sub("", line) for line in education]
+    digest.experience = parse_entries(sections.get("experience", []))
+    digest.projects = parse_entries(sections.get("projects", []))
+    digest.sections = {name: body for name, body in sections.items() if body}
+    return digest
+
+_digest_cache = OrderedDict()
+_digest_lock = threading.Lock()
+
+def get_resume_digest(text):
+    """parse_resume() with an LRU cache keyed by a hash of the text."""
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    with _digest_lock:
+        digest = _digest_cache.get(key)
+        if digest is not None:
+            _digest_cache.move_to_end(key)
+            return digest
+    digest = parse_resume(text)
+    with _digest_lock:
+        _digest_cache[key] = digest
+        while len(_digest_cache) > DIGEST_CACHE_SIZE:
+            _digest_cache.popitem(last=False)
+    return digest
+
+# Lines at the top of a resume searched for the candidate's name before the full text
+NAME_HEADER_LINES = 5
+
+def extract_name(text):
+    """
+    Candidate name from NER over the header region only, falling back to the
+    whole text when the header has no name. A cached digest is reused as is.
+    """
+    if not text:
+        return None
+    with _digest_lock:
+        digest = _digest_cache.get(hashlib.sha256(text.encode("utf-8")).hexdigest())
+    if digest is not None:
+        return digest.name
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    header_lines = split_sections(lines)["header"][:NAME_HEADER_LINES] or lines[:NAME_HEADER_LINES]
+    name = find_name(nlp_service.process("\n".join(header_lines), "ner"), header_lines)
+    if name is None:
+        name = find_name(nlp_service.process(text, "ner"), [])
+    return name
+
+def resume_prompt_text(text):
+    """The compact digest for prompts, or the truncated raw text when parsing found too little."""
+    if not text:
+        return ""
+    digest = get_resume_digest(text)
+    if digest.is_sparse():
+        return text[:RESUME_PROMPT_CHARS]
+    return digest.to_prompt()
+
+async def resume_for_prompt(text):
+    """resume_prompt_text() run on the nlp stage so parsing never blocks the event loop."""
+    return await run_in_stage("nlp", resume_prompt_text, text)
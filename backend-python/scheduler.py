@@ -0,0 +1,68 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+class StageOverloaded(Exception):
+    """Raised when a stage's queue is full; routes turn it into a 503 with Retry-After."""
+
+    def __init__(self, stage, retry_after):
+        super().__init__(f"{stage} stage is overloaded, retry in {retry_after} seconds")
+        self.stage = stage
+        self.retry_after = retry_after
+
+class Stage:
+    """
+    A class of blocking work (OCR, embedding, speech, ...) run off the event loop.
+
+    At most `concurrency` calls run at once on the stage's own threads and at
+    most `max_queue` more may wait; anything beyond that fails fast with
+    StageOverloaded instead of piling up behind slow requests. CPU-heavy OCR
+    itself runs in the process pool from ocr.py, so the stage threads only
+    dispatch to it and wait.
+    """
+
+    def __init__(self, name, concurrency, max_queue, retry_after):
+        self.name = name
+        self.concurrency = int(os.getenv(f"STAGE_{name.upper()}_CONCURRENCY", concurrency))
+        self.max_queue = int(os.getenv(f"STAGE_{name.upper()}_QUEUE", max_queue))
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=f"stage-{name}")
+        # Only touched from the event loop thread, so no lock is needed
+        self._pending = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        if self._pending >= self.concurrency + self.max_queue:
+            self.rejected += 1
+            raise StageOverloaded(self.name, self.retry_after)
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    def stats(self):
+        return {
+            "running": min(self._pending, self.concurrency),
+            "queued": max(self._pending - self.concurrency, 0),
+            "concurrency": self.concurrency,
+            "maxQueue": self.max_queue,
+            "rejected": self.rejected,
+        }
+
+stages = {
+    "ocr": Stage("ocr", concurrency=2, max_queue=8, retry_after=10),
+    # Embed threads mostly wait on the SBERT batcher, so more of them means fuller batches
+    "embed": Stage("embed", concurrency=16, max_queue=64, retry_after=2),
+    "nlp": Stage("nlp", concurrency=2, max_queue=16, retry_after=2),
+    "speech": Stage("speech", concurrency=4, max_queue=16, retry_after=5),
+    "io": Stage("io", concurrency=4, max_queue=16, retry_after=2),
+}
+
+async def run_in_stage(stage_name, fn, *args, **kwargs):
+    return await stages[stage_name].run(fn, *args, **kwargs)
+
+def stage_stats():
+    return {name: stage.stats() for name, stage in stages.items()}
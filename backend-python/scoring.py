@@ -0,0 +1,150 @@
+import os
+import re
+import numpy as np
+from resume_parser import split_sections, BULLET_RE
+from utils import encode_texts
+from cache import resume_cache
+from embedding_index import embedding_index
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces; windows of this many words stay under it
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", "150"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "30"))
+MAX_JD_REQUIREMENTS = int(os.getenv("MAX_JD_REQUIREMENTS", "40"))
+# Candidate search preselects this many times top_k from the index by whole-document cosine
+CANDIDATE_RERANK_FACTOR = int(os.getenv("CANDIDATE_RERANK_FACTOR", "3"))
+# Most resumes (uploads plus texts) one /api/analyze-resumes/batch call may score; larger sets go to /api/jobs
+BATCH_MAX_RESUMES = int(os.getenv("BATCH_MAX_RESUMES", "50"))
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?;])\s+")
+
+def sliding_windows(words, size=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    if len(words) <= size:
+        return [" ".join(words)]
+    step = max(1, size - overlap)
+    return [" ".join(words[start:start + size]) for start in range(0, len(words) - overlap, step)]
+
+def chunk_resume(text):
+    """
+    Split resume text into (section, chunk) pairs: one chunk per section,
+    with long sections cut into overlapping word windows so no part of the
+    resume falls beyond the encoder's input limit.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    chunks = []
+    for section, body in split_sections(lines).items():
+        words = " ".join(body).split()
+        if words:
+            chunks.extend((section, window) for window in sliding_windows(words))
+    return chunks
+
+def split_requirements(job_description):
+    """Requirement phrases of a job description: its bullets and sentences, deduplicated."""
+    requirements = []
+    for line in job_description.splitlines():
+        for sentence in _SENTENCE_SPLIT_RE.split(BULLET_RE.sub("", line)):
+            sentence = sentence.strip(" .;")
+            if len(sentence.split()) >= 3 and sentence not in requirements:
+                requirements.append(sentence)
+    return requirements[:MAX_JD_REQUIREMENTS] or [job_description.strip()]
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+def embed_resumes(texts):
+    """
+    Whole-document embedding plus per-window embeddings of each resume, in a
+    single encode call. The windows are what score_resume matches JD
+    requirements against, so they are cached alongside the document embedding.
+
+    Returns:
+        list: [{"embedding", "chunkSections": [section, ...], "chunkEmbeddings": array}]
+    """
+    chunked = [chunk_resume(text or "") for text in texts]
+    embeddings = encode_texts(list(texts) + [chunk for chunks in chunked for _, chunk in chunks])
+    results = []
+    offset = len(texts)
+    for i, chunks in enumerate(chunked):
+        results.append({
+            "embedding": embeddings[i],
+            "chunkSections": [section for section, _ in chunks],
+            "chunkEmbeddings": normalize_rows(embeddings[offset:offset + len(chunks)]),
+        })
+        offset += len(chunks)
+    return results
+
+def resume_chunks(artifacts):
+    """Section names and normalized window embeddings of a resume, encoded only if the artifacts lack them."""
+    if artifacts.get("chunkEmbeddings") is not None:
+        return artifacts["chunkSections"], artifacts["chunkEmbeddings"]
+    chunks = chunk_resume(artifacts.get("text") or "")
+    if not chunks:
+        return [], None
+    return [section for section, _ in chunks], normalize_rows(encode_texts([chunk for _, chunk in chunks]))
+
+def score_chunks(sections, chunk_embeddings, requirements, requirement_embeddings):
+    if not sections:
+        return {"score": 0.0, "sections": {}, "requirements": [{"text": r, "score": 0.0, "section": None} for r in requirements]}
+    # chunks x requirements cosine similarity matrix
+    similarity = np.clip(chunk_embeddings @ requirement_embeddings.T, 0.0, 1.0)
+    best_chunk = similarity.argmax(axis=0)
+    coverage = similarity.max(axis=0)
+
+    scores = {}
+    chunk_sections = np.array(sections)
+    for section in dict.fromkeys(sections):
+        scores[section] = round(float(similarity[chunk_sections == section].max(axis=0).mean()), 4)
+    return {
+        "score": float(coverage.mean()),
+        "sections": scores,
+        "requirements": [
+            {"text": text, "score": round(float(score), 4), "section": sections[index]}
+            for text, score, index in zip(requirements, coverage, best_chunk)
+        ],
+    }
+
+def score_resumes(artifacts_list, job_description):
+    """
+    Section-level ATS scores of many resumes against one job description.
+    The JD requirements are encoded once; resume windows come from the
+    cached artifacts (see embed_resumes), so cached resumes need no encoding.
+    Each requirement is credited with its best matching window, and the
+    overall score is the mean requirement coverage.
+
+    Returns:
+        list: [{"score": float, "sections": {section: float},
+                "requirements": [{"text", "score", "section"}]}]
+    """
+    requirements = split_requirements(job_description)
+    requirement_embeddings = normalize_rows(encode_texts(requirements))
+    return [score_chunks(*resume_chunks(artifacts), requirements, requirement_embeddings) for artifacts in artifacts_list]
+
+def score_resume(resume_text, job_description, artifacts=None):
+    """score_resumes() for one resume; pass its cached artifacts to skip re-encoding it."""
+    return score_resumes([artifacts or {"text": resume_text}], job_description)[0]
+
+def rescore_candidates(matches, job_description, top_k):
+    """
+    Re-rank embedding index matches by ATS score, using the window
+    embeddings stored with each index row (or, for rows indexed without
+    them, the resume cache). "similarity" keeps the index's whole-document
+    cosine; resumes with neither get "atsScore": None and rank last.
+    """
+    entries = []
+    for match in matches:
+        chunks = embedding_index.get_chunks(match["id"])
+        if chunks is not None:
+            entries.append({"chunkSections": chunks[0], "chunkEmbeddings": chunks[1]})
+        else:
+            entry = resume_cache.get(match["id"])
+            entries.append(entry if entry is not None and entry.get("text") else None)
+    scorable = [i for i, entry in enumerate(entries) if entry is not None]
+    scores = score_resumes([entries[i] for i in scorable], job_description)
+    for match in matches:
+        match["similarity"] = round(match.pop("score") * 100, 2)
+        match["atsScore"] = None
+    for i, score in zip(scorable, scores):
+        matches[i]["atsScore"] = round(score["score"] * 100, 2)
+        matches[i]["sectionScores"] = {section: round(value * 100, 2) for section, value in score["sections"].items()}
+    matches.sort(key=lambda m: (m["atsScore"] is not None, m["atsScore"] or 0.0, m["similarity"]), reverse=True)
+    return matches[:top_k]
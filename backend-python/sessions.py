@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import secrets
+import sqlite3
+import threading
+
+# "memory" keeps sessions in this worker; "sqlite" shares them across workers on the host
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+SESSION_TTL = float(os.getenv("SESSION_TTL", "7200"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.sqlite3")
+
+class MemorySessionBackend:
+    name = "memory"
+
+    def __init__(self, max_sessions=SESSION_MAX):
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            item = self._sessions.get(session_id)
+            if item is None:
+                return None
+            if item[0] < time.time():
+                del self._sessions[session_id]
+                return None
+            return item[1]
+
+    def save(self, session_id, session, ttl):
+        with self._lock:
+            self._sessions[session_id] = (time.time() + ttl, session)
+            if len(self._sessions) > self.max_sessions:
+                self._evict()
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict(self):
+        now = time.time()
+        for session_id in [sid for sid, (expires_at, _) in self._sessions.items() if expires_at < now]:
+            del self._sessions[session_id]
+        # Still full: drop the sessions closest to expiry
+        overflow = len(self._sessions) - self.max_sessions
+        if overflow > 0:
+            for session_id, _ in sorted(self._sessions.items(), key=lambda item: item[1][0])[:overflow]:
+                del self._sessions[session_id]
+
+    def __len__(self):
+        return len(self._sessions)
+
+class SQLiteSessionBackend:
+    name = "sqlite"
+
+    def __init__(self, path=SESSION_DB_PATH, max_sessions=SESSION_MAX):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+
+    def load(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE id = ? AND expires_at >= ?", (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id, session, ttl):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(session), now + ttl),
+            )
+            self._conn.execute("DELETE FROM sessions WHERE expires_at < ?", (now,))
+            self._conn.execute(
+                "DELETE FROM sessions WHERE id IN ("
+                "SELECT id FROM sessions ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+
+    def delete(self, session_id):
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions WHERE expires_at >= ?", (time.time(),)).fetchone()[0]
+
+class SessionStore:
+    """
+    Server-side interview sessions.
+
+    A session holds the resume text, artifacts derived from it once (e.g. the
+    candidate name), the question currently being asked and the Q&A history,
+    so clients only send the session id and their newest answer. Every save
+    extends the session's TTL.
+    """
+
+    def __init__(self, backend, ttl=SESSION_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    def create(self, resume_text, user_intro=None, artifacts=None):
+        session_id = secrets.token_urlsafe(16)
+        session = {
+            "resumeText": resume_text,
+            "userIntro": user_intro,
+            "artifacts": artifacts or {},
+            "currentQuestion": None,
+            "history": [],
+            "createdAt": time.time(),
+        }
+        self.backend.save(session_id, session, self.ttl)
+        return session_id, session
+
+    def get(self, session_id):
+        return self.backend.load(session_id)
+
+    def save(self, session_id, session):
+        self.backend.save(session_id, session, self.ttl)
+
+    def delete(self, session_id):
+        return self.backend.delete(session_id)
+
+    def stats(self):
+        return {"backend": self.backend.name, "sessions": len(self.backend), "ttl": self.ttl}
+
+def create_backend(name=SESSION_BACKEND):
+    if name == "sqlite":
+        return SQLiteSessionBackend()
+    return MemorySessionBackend()
+
+session_store = SessionStore(create_backend())
@@ -0,0 +1,75 @@
+# Skill and phrase vocabulary used by the resume parser and keyword-gap analysis.
+# Canonical display names; matching is case-insensitive. ALIASES maps
+# alternative spellings to their canonical name.
+
+SKILLS = [
+    # Programming languages
+    "Python", "Java", "JavaScript", "TypeScript", "C", "C++", "C#", "Go", "Rust", "Kotlin", "Swift",
+    "Ruby", "PHP", "Scala", "R", "MATLAB", "Dart", "Perl", "Bash", "Shell Scripting", "SQL", "Solidity",
+    # Web
+    "HTML", "CSS", "React", "Angular", "Vue", "Next.js", "Node.js", "Express", "Django", "Flask", "FastAPI",
+    "Spring Boot", "ASP.NET", "Laravel", "Ruby on Rails", "Tailwind CSS", "Bootstrap", "Redux", "GraphQL",
+    "REST APIs", "jQuery", "Svelte", "Vite", "Webpack",
+    # Mobile
+    "Android", "iOS", "Flutter", "React Native", "Jetpack Compose", "SwiftUI",
+    # Data and ML
+    "Machine Learning", "Deep Learning", "Artificial Intelligence", "Natural Language Processing",
+    "Computer Vision", "Data Science", "Data Analysis", "Data Visualization", "Data Engineering",
+    "Statistics", "TensorFlow", "PyTorch", "Keras", "scikit-learn", "Pandas", "NumPy", "SciPy",
+    "Matplotlib", "Seaborn", "OpenCV", "spaCy", "NLTK", "Hugging Face", "Transformers", "LLM",
+    "Generative AI", "Prompt Engineering", "LangChain", "Reinforcement Learning", "XGBoost",
+    "Power BI", "Tableau", "Excel", "Apache Spark", "Hadoop", "Airflow", "Kafka", "ETL", "MLOps",
+    # Databases
+    "MySQL", "PostgreSQL", "MongoDB", "SQLite", "Redis", "Oracle", "Firebase", "DynamoDB",
+    "Cassandra", "Elasticsearch", "Snowflake", "BigQuery",
+    # Cloud and DevOps
+    "AWS", "Azure", "Google Cloud", "Docker", "Kubernetes", "Terraform", "Ansible", "Jenkins",
+    "GitHub Actions", "CI/CD", "Linux", "Git", "Nginx", "Microservices", "Serverless", "DevOps",
+    # Practices and tools
+    "Agile", "Scrum", "Jira", "Unit Testing", "Test Automation", "Selenium", "Jest", "Pytest",
+    "System Design", "Object-Oriented Programming", "Data Structures", "Algorithms",
+    "Figma", "UI/UX", "Networking", "Cybersecurity", "Blockchain", "Embedded Systems", "IoT",
+    # Soft skills
+    "Leadership", "Communication", "Teamwork", "Problem Solving", "Project Management",
+    "Time Management", "Critical Thinking", "Collaboration", "Mentoring",
+]
+
+ALIASES = {
+    "js": "JavaScript",
+    "golang": "Go",
+    "reactjs": "React",
+    "react.js": "React",
+    "vuejs": "Vue",
+    "vue.js": "Vue",
+    "nodejs": "Node.js",
+    "nextjs": "Next.js",
+    "expressjs": "Express",
+    "ml": "Machine Learning",
+    "ai": "Artificial Intelligence",
+    "nlp": "Natural Language Processing",
+    "sklearn": "scikit-learn",
+    "postgres": "PostgreSQL",
+    "mongo": "MongoDB",
+    "gcp": "Google Cloud",
+    "amazon web services": "AWS",
+    "microsoft azure": "Azure",
+    "k8s": "Kubernetes",
+    "ci cd": "CI/CD",
+    "oop": "Object-Oriented Programming",
+    "dsa": "Data Structures",
+    "restful apis": "REST APIs",
+    "large language models": "LLM",
+    "genai": "Generative AI",
+    "spark": "Apache Spark",
+    "ms excel": "Excel",
+}
+
+# Skills that are also common English words only match with their exact casing
+CASE_SENSITIVE_SKILLS = {"C", "R", "Go", "Swift", "Rust", "Dart", "Express", "Oracle", "Excel"}
+
+_CANONICAL = {skill.lower(): skill for skill in SKILLS}
+_CANONICAL.update(ALIASES)
+
+def canonical_skill(phrase):
+    """Map a matched phrase to its canonical skill name."""
+    return _CANONICAL.get(phrase.lower(), phrase)
@@ -1,89 +1,280 @@
 import speech_recognition as sr
 import os
-import tempfile
-from pydub import AudioSegment
-import io
+import json
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from audio import decode_audio, AudioRejected, SAMPLE_RATE, SAMPLE_WIDTH
+
+# "google" (network), or a local CPU engine: "vosk" or "whisper" (faster-whisper)
+STT_BACKEND = os.getenv("STT_BACKEND", "google").lower()
+VOSK_MODEL_PATH = os.getenv("VOSK_MODEL_PATH", "vosk-model-small-en-us-0.15")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base.en")
+# Audio longer than STT_CHUNK_SECONDS is split on silence and transcribed in STT_WORKERS processes
+STT_CHUNK_SECONDS = float(os.getenv("STT_CHUNK_SECONDS", "20"))
+STT_WORKERS = int(os.getenv("STT_WORKERS", "2"))
+# Frames quieter than this are silence; a pause must last STT_MIN_SILENCE_MS to be a split point
+STT_SILENCE_DBFS = float(os.getenv("STT_SILENCE_DBFS", "-40"))
+STT_MIN_SILENCE_MS = int(os.getenv("STT_MIN_SILENCE_MS", "300"))
+# Live audio: a pause this long ends the candidate's answer; answers are cut off after STT_MAX_TURN_SECONDS
+STT_END_SILENCE_MS = int(os.getenv("STT_END_SILENCE_MS", "900"))
+STT_MAX_TURN_SECONDS = float(os.getenv("STT_MAX_TURN_SECONDS", "180"))
+
+FRAME_MS = 30
+
+class GoogleBackend:
+    """Google Web Speech API through SpeechRecognition (needs network access)."""
+
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE):
+        try:
+            return self.recognizer.recognize_google(sr.AudioData(pcm, sample_rate, SAMPLE_WIDTH))
+        except sr.UnknownValueError:
+            return ""
+
+class VoskBackend:
+    """Offline Kaldi recognizer; VOSK_MODEL_PATH points at an unpacked Vosk model."""
+
+    name = "vosk"
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        self.model = Model(model_path)
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE):
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(self.model, sample_rate)
+        # The cffi binding only takes bytes (a no-op for bytes input)
+        recognizer.AcceptWaveform(bytes(pcm))
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+class WhisperBackend:
+    """Offline Whisper on CPU via faster-whisper (int8)."""
+
+    name = "whisper"
+
+    def __init__(self, model_name=WHISPER_MODEL):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model_name, device="cpu", compute_type="int8")
+
+    def transcribe(self, pcm, sample_rate=SAMPLE_RATE):
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = self.model.transcribe(audio, language="en", vad_filter=False)
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+BACKENDS = {"google": GoogleBackend, "vosk": VoskBackend, "whisper": WhisperBackend}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_backend(name=STT_BACKEND):
+    """One instance per backend and process, so local models load once per worker."""
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = BACKENDS[name]()
+    return backend
+
+def transcribe_chunk(backend_name, pcm, sample_rate=SAMPLE_RATE):
+    return get_backend(backend_name).transcribe(pcm, sample_rate)
+
+_executor = None
+
+def get_stt_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=STT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+def split_on_silence(pcm, sample_rate=SAMPLE_RATE, max_seconds=STT_CHUNK_SECONDS):
+    """
+    Split PCM into chunks of at most max_seconds, cutting in the middle of the
+    longest pause inside each window (or hard at the limit if there is none).
+    Returns (start, end) byte offsets.
+    """
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    frame = sample_rate * FRAME_MS // 1000
+    count = len(samples) // frame
+    max_frames = max(2, int(max_seconds * 1000 / FRAME_MS))
+    if count <= max_frames:
+        return [(0, len(pcm))]
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    silent = rms < 32768 * 10 ** (STT_SILENCE_DBFS / 20)
+    # Start and length of the silent run each frame belongs to
+    run_starts = np.zeros(count, dtype=np.int64)
+    run_lengths = np.zeros(count, dtype=np.int64)
+    start = None
+    for i, is_silent in enumerate(np.append(silent, False)):
+        if is_silent and start is None:
+            start = i
+        elif not is_silent and start is not None:
+            run_starts[start:i] = start
+            run_lengths[start:i] = i - start
+            start = None
+    min_run = STT_MIN_SILENCE_MS // FRAME_MS
+    cuts = [0]
+    while count - cuts[-1] > max_frames:
+        # Look for a pause in the second half of the window so chunks don't get too short
+        low, high = cuts[-1] + max_frames // 2, cuts[-1] + max_frames
+        best = low + int(np.argmax(run_lengths[low:high]))
+        if run_lengths[best] >= min_run:
+            cut = run_starts[best] + run_lengths[best] // 2
+            cuts.append(int(min(max(cut, low), high)))
+        else:
+            cuts.append(high)
+    bytes_per_frame = frame * SAMPLE_WIDTH
+    offsets = [c * bytes_per_frame for c in cuts] + [len(pcm)]
+    return list(zip(offsets[:-1], offsets[1:]))
+
+def is_silent_frame(frame):
+    samples = np.frombuffer(frame, dtype=np.int16).astype(np.float32)
+    return float(np.sqrt(np.mean(samples ** 2))) < 32768 * 10 ** (STT_SILENCE_DBFS / 20)
+
+class SpeechSegmenter:
+    """
+    Energy-based endpointing for a live 16 kHz mono 16-bit PCM stream.
+
+    feed() returns events as audio arrives: ("phrase", pcm) after each short
+    pause, so phrases can be transcribed while the candidate keeps talking,
+    and ("end", pcm) with the remaining audio once the pause is long enough
+    to end the answer (or the answer hits the length cap). Leading silence
+    is dropped apart from a short pre-roll.
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, phrase_silence_ms=STT_MIN_SILENCE_MS,
+                 end_silence_ms=STT_END_SILENCE_MS, max_turn_seconds=STT_MAX_TURN_SECONDS):
+        self.frame_bytes = sample_rate * FRAME_MS // 1000 * SAMPLE_WIDTH
+        self.phrase_frames = max(1, phrase_silence_ms // FRAME_MS)
+        self.end_frames = max(self.phrase_frames + 1, end_silence_ms // FRAME_MS)
+        self.max_turn_frames = int(max_turn_seconds * 1000 / FRAME_MS)
+        self.reset()
+
+    def reset(self):
+        """Forget all buffered audio, including a partial frame, and start a new answer."""
+        self.pending = b""
+        self.phrase = bytearray()
+        self.phrase_has_speech = False
+        self.preroll = []
+        self.speaking = False
+        self.silent_frames = 0
+        self.turn_frames = 0
+
+    def feed(self, pcm):
+        events = []
+        data = self.pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        for offset in range(0, usable, self.frame_bytes):
+            event = self._feed_frame(data[offset:offset + self.frame_bytes])
+            if event is not None:
+                events.append(event)
+        # Set after the frames: a turn ending mid-chunk resets, but the tail belongs to the next answer
+        self.pending = data[usable:]
+        return events
+
+    def flush(self):
+        """End the answer now (e.g. the client pressed stop), returning the untranscribed audio."""
+        pcm = bytes(self.phrase) if self.phrase_has_speech else b""
+        self.reset()
+        return pcm
+
+    def _feed_frame(self, frame):
+        silent = is_silent_frame(frame)
+        if not self.speaking:
+            if silent:
+                self.preroll = (self.preroll + [frame])[-self.phrase_frames:]
+                return None
+            self.speaking = True
+            self.phrase.extend(b"".join(self.preroll))
+            self.preroll = []
+        self.turn_frames += 1
+        self.phrase.extend(frame)
+        if not silent:
+            self.silent_frames = 0
+            self.phrase_has_speech = True
+        else:
+            self.silent_frames += 1
+        if self.silent_frames >= self.end_frames or self.turn_frames >= self.max_turn_frames:
+            return ("end", self.flush())
+        if self.silent_frames == self.phrase_frames and self.phrase_has_speech:
+            phrase = bytes(self.phrase)
+            self.phrase = bytearray()
+            self.phrase_has_speech = False
+            return ("phrase", phrase)
+        return None
+
+def transcribe_pcm(pcm, backend_name=STT_BACKEND):
+    """
+    Transcribe PCM with the configured backend. Long audio is split on silence
+    and the chunks are transcribed in parallel worker processes, then joined
+    in order.
+    """
+    view = memoryview(pcm)
+    chunks = [view[start:end] for start, end in split_on_silence(pcm)]
+    if len(chunks) == 1 or STT_WORKERS <= 1:
+        texts = [transcribe_chunk(backend_name, chunk) for chunk in chunks]
+    else:
+        # Worker processes need picklable bytes; in-process chunks stay views
+        executor = get_stt_executor()
+        texts = list(executor.map(transcribe_chunk, [backend_name] * len(chunks), [bytes(chunk) for chunk in chunks]))
+    return " ".join(text.strip() for text in texts if text and text.strip())
 
 def convert_audio_to_text(audio_data, audio_format="wav"):
     """
-    Convert audio data to text using Google Speech Recognition
-    
+    Convert audio data to text with the configured speech-to-text backend
+
     Args:
         audio_data: Raw audio data (bytes)
-        audio_format: Format of the audio (wav, mp3, etc.)
-    
+        audio_format: Format hint (file extension) for audio whose container cannot be sniffed
+
     Returns:
         dict: {"success": bool, "text": str, "error": str}
     """
     try:
         print(f"Processing audio data of size: {len(audio_data)} bytes")
         print(f"Audio format: {audio_format}")
-        
-        # Create a recognizer instance
-        recognizer = sr.Recognizer()
-        
-        # Convert audio data to AudioSegment
-        try:
-            if audio_format.lower() == "wav":
-                audio = AudioSegment.from_wav(io.BytesIO(audio_data))
-            elif audio_format.lower() == "mp3":
-                audio = AudioSegment.from_mp3(io.BytesIO(audio_data))
-            elif audio_format.lower() == "ogg":
-                audio = AudioSegment.from_ogg(io.BytesIO(audio_data))
-            elif audio_format.lower() == "webm":
-                audio = AudioSegment.from_file(io.BytesIO(audio_data), format="webm")
-            else:
-                # Try to detect format automatically
-                audio = AudioSegment.from_file(io.BytesIO(audio_data))
-        except Exception as format_error:
-            print(f"Error converting audio format: {format_error}")
-            # Try with webm format as fallback
-            try:
-                audio = AudioSegment.from_file(io.BytesIO(audio_data), format="webm")
-            except Exception as fallback_error:
-                print(f"Fallback conversion also failed: {fallback_error}")
-                return {
-                    "success": False,
-                    "text": "",
-                    "error": f"Unsupported audio format: {audio_format}. Error: {format_error}"
-                }
-        
-        print(f"Audio duration: {len(audio)} ms")
-        
-        # Convert to WAV format for speech recognition
-        wav_data = io.BytesIO()
-        audio.export(wav_data, format="wav")
-        wav_data.seek(0)
-        
-        print("Audio converted to WAV format")
-        
-        # Create AudioFile object
-        with sr.AudioFile(wav_data) as source:
-            # Adjust for ambient noise
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            
-            # Record the audio
-            audio_data = recognizer.record(source)
-            
-            print("Sending to Google Speech Recognition...")
-            
-            # Use Google Speech Recognition
-            text = recognizer.recognize_google(audio_data)
-            
-            print(f"Recognition successful: {text}")
-            
+
+        pcm = decode_audio(audio_data, audio_format)
+        if pcm is None:
+            return {
+                "success": False,
+                "text": "",
+                "error": f"Unsupported audio format: {audio_format}"
+            }
+
+        print(f"Audio duration: {len(pcm) * 1000 // (SAMPLE_RATE * SAMPLE_WIDTH)} ms")
+        print(f"Transcribing with the {STT_BACKEND} backend...")
+
+        text = transcribe_pcm(pcm)
+        if not text:
+            print("Speech could not be understood")
             return {
-                "success": True,
-                "text": text,
-                "error": None
+                "success": False,
+                "text": "",
+                "error": "Speech could not be understood. Please try speaking more clearly."
             }
-            
-    except sr.UnknownValueError:
-        print("Speech could not be understood")
+
+        print(f"Recognition successful: {text}")
+        return {
+            "success": True,
+            "text": text,
+            "error": None
+        }
+
+    except AudioRejected as e:
+        print(f"Audio rejected: {e}")
         return {
             "success": False,
             "text": "",
-            "error": "Speech could not be understood. Please try speaking more clearly."
+            "error": str(e)
         }
     except sr.RequestError as e:
         print(f"Google Speech Recognition request error: {e}")
@@ -104,51 +295,21 @@ def convert_audio_to_text(audio_data, audio_format="wav"):
 
 def convert_audio_file_to_text(file_path, audio_format="wav"):
     """
-    Convert audio file to text using Google Speech Recognition
-    
+    Convert audio file to text with the configured speech-to-text backend
+
     Args:
         file_path: Path to the audio file
         audio_format: Format of the audio file
-    
+
     Returns:
         dict: {"success": bool, "text": str, "error": str}
     """
     try:
-        # Create a recognizer instance
-        recognizer = sr.Recognizer()
-        
-        # Use the audio file as the source
-        with sr.AudioFile(file_path) as source:
-            # Adjust for ambient noise
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            
-            # Record the audio
-            audio_data = recognizer.record(source)
-            
-            # Use Google Speech Recognition
-            text = recognizer.recognize_google(audio_data)
-            
-            return {
-                "success": True,
-                "text": text,
-                "error": None
-            }
-            
-    except sr.UnknownValueError:
-        return {
-            "success": False,
-            "text": "",
-            "error": "Speech could not be understood. Please try speaking more clearly."
-        }
-    except sr.RequestError as e:
-        return {
-            "success": False,
-            "text": "",
-            "error": f"Could not request results from Google Speech Recognition service: {str(e)}"
-        }
+        with open(file_path, "rb") as f:
+            return convert_audio_to_text(f.read(), audio_format)
     except Exception as e:
         return {
             "success": False,
             "text": "",
             "error": f"Error processing audio file: {str(e)}"
-        } 
\ No newline at end of file
+        }
@@ -1,55 +1,137 @@
-import tempfile
 import os
-import cv2
+import io
+import PyPDF2
 import numpy as np
-import pytesseract
-from pdf2image import convert_from_path
-from sentence_transformers import SentenceTransformer, util as sbert_util
-from keybert import KeyBERT
-import spacy
-
-# Load models globally
-sbert_model = SentenceTransformer('all-MiniLM-L6-v2')
-keybert_model = KeyBERT('all-MiniLM-L6-v2')
-nlp = spacy.load('en_core_web_sm')
-
-def extract_text_from_pdf_ocr(uploaded_file):
-    text = ""
+from ocr import ocr_pdf, ocr_pages
+from cache import resume_cache, content_hash
+from models import get_sbert_model, get_keybert_model
+from nlp_service import nlp_service
+from embedding_service import embedding_service
+from resume_parser import extract_name
+
+# Models are loaded lazily through the registry in models.py
+
+# A text-layer page shorter than this, or with too many odd glyphs, is OCRed instead
+MIN_PAGE_CHARS = int(os.getenv("MIN_PAGE_CHARS", "100"))
+MIN_GLYPH_RATIO = 0.85
+_SANE_PUNCTUATION = set(".,;:!?-_()[]/\\@+&%#*'\"|•–—")
+
+def is_usable_page_text(page_text):
+    stripped = page_text.strip()
+    if len(stripped) < MIN_PAGE_CHARS:
+        return False
+    # Broken font encodings show up as replacement chars or "(cid:NN)" tokens
+    if "\ufffd" in stripped or "(cid:" in stripped:
+        return False
+    sane = sum(1 for c in stripped if c.isalnum() or c.isspace() or c in _SANE_PUNCTUATION)
+    return sane / len(stripped) >= MIN_GLYPH_RATIO
+
+def extract_text_from_pdf(uploaded_file):
+    """
+    Extract resume text, reading the embedded text layer first and only
+    OCRing the pages whose text layer is missing or unusable.
+
+    Returns:
+        dict: {"text": str, "pages": [{"page": int, "source": "text" | "ocr"}]},
+        where OCRed pages also carry their "confidence" (0-100) and "dpi"
+    """
+    pdf_bytes = uploaded_file.read()
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(uploaded_file.read())
-            tmp_file.seek(0)
-            images = convert_from_path(tmp_file.name)
-            for image in images:
-                image_np = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-                gray = cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY)
-                text += pytesseract.image_to_string(gray) + "\n"
+        reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        page_texts = []
+        for page in reader.pages:
+            try:
+                page_texts.append(page.extract_text() or "")
+            except Exception:
+                page_texts.append("")
+    except Exception as e:
+        print(f"Error reading PDF text layer, falling back to OCR: {str(e)}")
+        page_texts = []
+
+    pages = [{"page": i + 1, "source": "text"} for i in range(len(page_texts))]
+    ocr_numbers = [i + 1 for i, t in enumerate(page_texts) if not is_usable_page_text(t)]
+    try:
+        if not page_texts:
+            results = ocr_pdf(pdf_bytes)
+            ocr_numbers = list(range(1, len(results) + 1))
+            page_texts = [""] * len(results)
+            pages = [{"page": n, "source": "ocr"} for n in ocr_numbers]
+        elif ocr_numbers:
+            results = ocr_pages(pdf_bytes, ocr_numbers)
+        else:
+            results = []
+        # Pages past the OCR page cap or text limit keep their (unusable) text layer
+        for page_number, result in zip(ocr_numbers, results):
+            page_texts[page_number - 1] = result["text"]
+            pages[page_number - 1].update(source="ocr", confidence=result["confidence"], dpi=result["dpi"])
     except Exception as e:
         print(f"Error extracting text using OCR: {str(e)}")
-        return ""
-    finally:
-        if 'tmp_file' in locals():
-            os.unlink(tmp_file.name)
-    return text.strip()
+
+    text = "\n".join(t.strip() for t in page_texts if t.strip())
+    return {"text": text, "pages": pages}
 
 def preprocess_text(text):
-    doc = nlp(text.lower())
+    doc = nlp_service.process(text.lower(), "lemma")
     tokens = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
     return " ".join(tokens)
 
-def extract_keywords(text):
-    keywords = keybert_model.extract_keywords(text, keyphrase_ngram_range=(1, 2), stop_words='english', top_n=100)
+def extract_keywords(text, top_n=100):
+    keywords = get_keybert_model().extract_keywords(text, keyphrase_ngram_range=(1, 2), stop_words='english', top_n=top_n)
     return [kw[0] for kw in keywords]
 
-def calculate_similarity(resume_text, job_description):
-    embeddings = sbert_model.encode([resume_text, job_description], convert_to_tensor=True)
-    similarity_score = sbert_util.pytorch_cos_sim(embeddings[0], embeddings[1])
-    return similarity_score.item()
+def encode_text(text):
+    return embedding_service.encode([text])[0]
+
+def encode_texts(texts):
+    if not texts:
+        return np.zeros((0, get_sbert_model().get_sentence_embedding_dimension()), dtype=np.float32)
+    return embedding_service.encode(texts)
+
+def embed_resumes(texts):
+    # scoring imports this module for encode_texts
+    from scoring import embed_resumes
+    return embed_resumes(texts)
+
+def get_resume_artifacts(pdf_bytes):
+    """
+    Return the extracted text, page sources, embedding and scoring window
+    embeddings for a PDF, reusing the content-addressed cache so repeat
+    uploads skip OCR and encoding.
+    """
+    key = content_hash(pdf_bytes)
+    entry = resume_cache.get(key)
+    if entry is not None and entry.get("chunkEmbeddings") is not None:
+        return entry
+    if entry is not None:
+        # Cached before window embeddings were stored: add them once
+        entry.update(embed_resumes([entry["text"]])[0])
+        resume_cache.put(key, entry)
+        return entry
+    extracted = extract_text_from_pdf(io.BytesIO(pdf_bytes))
+    entry = {"text": extracted["text"], "pages": extracted["pages"]}
+    entry.update(embed_resumes([entry["text"]])[0])
+    # Don't pin failed extractions in the cache
+    if entry["text"]:
+        resume_cache.put(key, entry)
+    return entry
+
+def get_resume_artifacts_batch(pdf_bytes_list):
+    """
+    Batch version of get_resume_artifacts: cache misses are extracted one by
+    one, then all of their embeddings are computed in a single encode call.
+    """
+    keys = [content_hash(pdf_bytes) for pdf_bytes in pdf_bytes_list]
+    entries = [resume_cache.get(key) for key in keys]
+    missing = [i for i, entry in enumerate(entries) if entry is None or entry.get("chunkEmbeddings") is None]
+    for i in missing:
+        if entries[i] is None:
+            extracted = extract_text_from_pdf(io.BytesIO(pdf_bytes_list[i]))
+            entries[i] = {"text": extracted["text"], "pages": extracted["pages"]}
+    for i, embeddings in zip(missing, embed_resumes([entries[i]["text"] for i in missing])):
+        entries[i].update(embeddings)
+        if entries[i]["text"]:
+            resume_cache.put(keys[i], entries[i])
+    return entries
 
 def extract_name_from_resume(text):
-    doc = nlp(text)
-    # Find the first PERSON entity
-    for ent in doc.ents:
-        if ent.label_ == 'PERSON':
-            return ent.text
-    return None 
\ No newline at end of file
+    return extract_name(text) 
\ No newline at end of file